@@ -1,24 +1,173 @@
 # Importing calculate_distance to fix the import error.
 import os
 import math
+import atexit
 import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+import numpy as np
 from flask import Flask, render_template, request, jsonify
-from route_planner.a_star import MultiCriteriaAStar
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import RequestEntityTooLarge
+from route_planner.a_star import CRITERIA, MultiCriteriaAStar
 from route_planner.terrain import TerrainAnalyzer
 import route_planner.utils
 from route_planner.utils import calculate_distance
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+try:
+    import orjson
+except ImportError:  # orjson is optional, Flask's JSON encoder is used without it
+    orjson = None
+
+# Configure logging (set LOG_LEVEL=DEBUG for verbose output)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
+class NumpyJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that also serializes NumPy arrays and scalars, like orjson does."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (np.ndarray, np.generic)):
+            return o.tolist()
+        return DefaultJSONProvider.default(o)
+
 # Create Flask app
 app = Flask(__name__)
+app.json = NumpyJSONProvider(app)
 app.secret_key = os.environ.get("SESSION_SECRET", "default_secret_key_for_development")
+# Route requests are a few hundred bytes; reject oversized bodies before parsing them
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get("MAX_REQUEST_SIZE", 64 * 1024))
 
-# Initialize terrain analyzer
+# Initialize terrain analyzer once per process. The deployment runs gunicorn
+# with --preload, so its feature data is loaded in the master process and
+# shared copy-on-write by all forked web workers; the route workers share
+# the copy of their fork server (see _route_mp_context).
 terrain_analyzer = TerrainAnalyzer()
 
+# Default weights of the route optimization criteria, in CRITERIA order
+DEFAULT_CRITERIA_WEIGHTS = (
+    0.3,   # Base weight for distance
+    0.2,   # Terrain difficulty weight
+    0.15,  # Environmental impact weight
+    0.2,   # Construction cost weight
+    0.15,  # Maintenance access weight
+)
+
+# Bounding boxes of /api/terrain requests are snapped to this many decimal
+# places (~100 m) so that repeated map views hit the cache
+TERRAIN_BBOX_PRECISION = 3
+
+@lru_cache(maxsize=128)
+def _cached_terrain_data(north, south, east, west):
+    """Get terrain data for a snapped bounding box, caching recent areas."""
+    return terrain_analyzer.get_terrain_data(north, south, east, west)
+
+# Route coordinates are sent with this many decimal places (~1 m), about the
+# precision of a float32 and well below that of the route descriptions
+ROUTE_COORD_PRECISION = 5
+
+# Route searches run in a bounded pool of worker processes so that a long
+# A* search doesn't hold the request thread or the GIL of the web worker
+ROUTE_WORKERS = int(os.environ.get("ROUTE_WORKERS", os.cpu_count() or 1))
+ROUTE_TIMEOUT = float(os.environ.get("ROUTE_TIMEOUT", 300))
+
+# Route workers are forked from a single-threaded fork server rather than
+# from the web worker, whose request threads may hold the logging or
+# terrain cache locks at the time of the fork; a worker inheriting a held
+# lock would hang forever. The fork server imports this module once, so the
+# workers still share its terrain data copy-on-write.
+_route_mp_context = multiprocessing.get_context("forkserver")
+_route_mp_context.set_forkserver_preload([__name__])
+
+_route_executor = None
+_route_executor_lock = threading.Lock()
+
+def _get_route_executor():
+    """Get the process pool for route searches, creating it on first use."""
+    global _route_executor
+    with _route_executor_lock:
+        if _route_executor is None:
+            _route_executor = ProcessPoolExecutor(max_workers=ROUTE_WORKERS, mp_context=_route_mp_context)
+        return _route_executor
+
+@atexit.register
+def _shutdown_route_executor():
+    """Stop the route workers when the web worker exits."""
+    if _route_executor is not None:
+        _route_executor.shutdown(wait=False, cancel_futures=True)
+
+def _discard_route_executor(executor):
+    """
+    Drop a broken process pool, so that the next search creates a new one.
+
+    Another request may already have replaced the pool, which is then kept.
+    """
+    global _route_executor
+    with _route_executor_lock:
+        if _route_executor is executor:
+            _route_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _run_route_search(*args):
+    """
+    Run _calculate_routes in the process pool and wait for its result.
+
+    If a worker process died and broke the pool, the search is retried
+    once in a new pool.
+
+    Raises:
+        BrokenProcessPool: If the new pool breaks as well
+        FuturesTimeoutError: If the search takes longer than ROUTE_TIMEOUT
+    """
+    for attempt in range(2):
+        executor = _get_route_executor()
+        try:
+            future = executor.submit(_calculate_routes, *args)
+            try:
+                return future.result(timeout=ROUTE_TIMEOUT)
+            except FuturesTimeoutError:
+                # Let a search that hasn't started yet leave its place in the queue
+                future.cancel()
+                raise
+        except BrokenProcessPool:
+            logger.warning("Route worker pool is broken, starting a new one")
+            _discard_route_executor(executor)
+            if attempt:
+                raise
+
+def json_dumps(payload):
+    """Serialize an API payload to JSON bytes, using orjson when it is installed."""
+    if orjson is None:
+        return app.json.dumps(payload).encode('utf-8')
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+def json_response(payload, status=200):
+    """Serialize an API payload to a JSON response."""
+    if orjson is None:
+        return jsonify(payload), status
+    return app.response_class(json_dumps(payload), status=status, mimetype='application/json')
+
+def routes_response(result_paths):
+    """
+    Stream a successful route response one route at a time.
+
+    The first bytes are sent while the remaining routes are still being
+    serialized, so large responses reach slow clients sooner.
+    """
+    def generate():
+        yield b'{"success":true,"routes":['
+        for i, path in enumerate(result_paths):
+            if i:
+                yield b','
+            yield json_dumps(path)
+        yield b']}'
+
+    return app.response_class(generate(), mimetype='application/json')
+
 @app.route('/')
 def index():
     """Render the main application page."""
@@ -33,17 +182,19 @@ def new_index():
 def calculate_route():
     """API endpoint to calculate the optimal and alternative routes using multi-criteria A* algorithm."""
     try:
-        data = request.json
-        logger.debug(f"Received route calculation request: {data}")
+        data = request.get_json(cache=False, silent=True)
+        if not isinstance(data, dict):
+            return json_response({'success': False, 'error': 'Некорректный формат запроса: ожидается JSON-объект'}, 400)
+        logger.debug("Received route calculation request: %s", data)
         
         # Validate input parameters
         validation_result = route_planner.utils.validate_input(data)
         if not validation_result['valid']:
-            return jsonify({'success': False, 'error': validation_result['message']}), 400
+            return json_response({'success': False, 'error': validation_result['message']}, 400)
         
-        # Parse start and end points
-        start_point = route_planner.utils.parse_coordinates(data.get('startPoint'))
-        end_point = route_planner.utils.parse_coordinates(data.get('endPoint'))
+        # Start and end points, as parsed during validation
+        start_point = validation_result['start_point']
+        end_point = validation_result['end_point']
         
         # Get other parameters
         pipe_type = data.get('pipeType', 'oil')
@@ -54,95 +205,132 @@ def calculate_route():
         # Get criteria weights from user input if available
         user_weights = data.get('criteriaWeights', {})
         
-        # Create criteria weights based on input parameters
-        criteria_weights = {
-            'distance': 0.3,  # Base weight for distance
-            'terrain_difficulty': 0.2,  # Terrain difficulty weight
-            'environmental_impact': 0.15,  # Environmental impact weight
-            'construction_cost': 0.2,  # Construction cost weight
-            'maintenance_access': 0.15,  # Maintenance access weight
-        }
-        
-        # Override with user-defined weights if provided
-        if user_weights:
-            for key in criteria_weights:
-                if key in user_weights:
-                    criteria_weights[key] = float(user_weights[key])
-        
+        # Create criteria weights, overridden with user-defined weights if provided
+        weights = np.array([
+            float(user_weights.get(key, default)) if user_weights else default
+            for key, default in zip(CRITERIA, DEFAULT_CRITERIA_WEIGHTS)
+        ])
+
         # Normalize weights
-        total_weight = sum(criteria_weights.values())
+        total_weight = weights.sum()
         if total_weight > 0:
-            for key in criteria_weights:
-                criteria_weights[key] = criteria_weights[key] / total_weight
+            weights /= total_weight
+        criteria_weights = dict(zip(CRITERIA, weights.tolist()))
         
-        # Create A* algorithm instance
-        astar = MultiCriteriaAStar(
-            start=start_point,
-            goal=end_point,
-            terrain_analyzer=terrain_analyzer,
-            pipe_diameter=pipe_diameter,
-            pipe_material=pipe_material,
-            max_pressure=max_pressure,
-            pipe_type=pipe_type,
-            criteria_weights=criteria_weights
+        # Run the search in the worker pool so the request thread only waits for it
+        result_paths = _run_route_search(
+            start_point,
+            end_point,
+            pipe_type,
+            pipe_diameter,
+            pipe_material,
+            max_pressure,
+            criteria_weights
         )
-        
-        # Calculate the route and alternatives
-        logger.debug("Calling astar.find_paths() to calculate the route and alternatives...")
-        paths = astar.find_paths(num_alternatives=2)  # Adjust the number of alternatives as needed
 
-        # Ensure paths are in the correct format
-        if not isinstance(paths, list) or not all(isinstance(item, tuple) and len(item) == 2 for item in paths):
-            raise ValueError("astar.find_paths() returned an unexpected result format.")
-        
-        # Prepare the result data
-        result_paths = []
-        for i, (route, metrics) in enumerate(paths):
-            if not route:
-                continue  # Skip empty routes
-
-            # Calculate total distance
-            total_distance = route_planner.utils.calculate_distance(route)
-
-            # Generate route description
-            route_description = generate_route_description(
-                start_point, 
-                end_point, 
-                route, 
-                metrics, 
-                terrain_analyzer,
-                criteria_weights
-            )
-            
-            # Calculate construction time in human-readable format
-            construction_time = calculate_construction_time(
-                metrics, 
-                pipe_diameter, 
-                pipe_type
-            )
-            
-            # Append route details to the result
-            result_paths.append({
-                'route': route,
-                'metrics': metrics,
-                'total_distance': total_distance,
-                'estimated_cost': metrics.get('estimated_cost', None),
-                'terrain_difficulty': metrics.get('terrain_difficulty_score', None),
-                'environmental_impact': metrics.get('environmental_impact_score', None),
-                'construction_time': construction_time,
-                'route_description': route_description,
-                'alternative_num': metrics.get('alternative_num', 0)  # 0 for main route
-            })
-            
-        logger.debug(f"Route calculation successful with {len(result_paths)} routes: {result_paths}")
-        return jsonify({'success': True, 'routes': result_paths})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Route calculation successful with %d routes: %s", len(result_paths), result_paths)
+        return routes_response(result_paths)
         
+    except RequestEntityTooLarge:
+        return json_response({'success': False, 'error': 'Слишком большой запрос'}, 413)
+
+    except FuturesTimeoutError:
+        logger.error("Route calculation timed out after %s s", ROUTE_TIMEOUT)
+        return json_response({
+            'success': False,
+            'error': 'Превышено время расчета маршрута'
+        }, 504)
+
+    except BrokenProcessPool:
+        logger.error("Route worker pool broke again after being restarted")
+        return json_response({
+            'success': False,
+            'error': 'Сервис расчета маршрутов временно недоступен'
+        }, 503)
+
     except Exception as e:
-        logger.error(f"Error calculating route: {str(e)}", exc_info=True)
-        return jsonify({
+        logger.error("Error calculating route: %s", e, exc_info=True)
+        return json_response({
             'success': False,
             'error': f'Произошла ошибка при расчете маршрута: {str(e)}'
-        }), 500
+        }, 500)
+
+def _calculate_routes(start_point, end_point, pipe_type, pipe_diameter, pipe_material,
+                      max_pressure, criteria_weights):
+    """
+    Calculate the optimal and alternative routes with their descriptions.
+
+    Runs in a worker process of the route executor, using that process's
+    terrain analyzer.
+    """
+    # Create A* algorithm instance
+    astar = MultiCriteriaAStar(
+        start=start_point,
+        goal=end_point,
+        terrain_analyzer=terrain_analyzer,
+        pipe_diameter=pipe_diameter,
+        pipe_material=pipe_material,
+        max_pressure=max_pressure,
+        pipe_type=pipe_type,
+        criteria_weights=criteria_weights
+    )
+    
+    # Calculate the route and alternatives
+    logger.debug("Calling astar.find_paths() to calculate the route and alternatives...")
+    paths = astar.find_paths(num_alternatives=2)  # Adjust the number of alternatives as needed
+
+    # Ensure paths are in the correct format
+    if not isinstance(paths, list) or not all(isinstance(item, tuple) and len(item) == 2 for item in paths):
+        raise ValueError("astar.find_paths() returned an unexpected result format.")
+    
+    # Prepare the result data
+    result_paths = []
+    for i, (route, metrics) in enumerate(paths):
+        if not route:
+            continue  # Skip empty routes
+
+        # Metrics used more than once below
+        path_distance = metrics['total_distance']
+        estimated_cost = metrics.get('estimated_cost')
+        terrain_difficulty = metrics.get('terrain_difficulty_score')
+
+        # Calculate total distance
+        total_distance = route_planner.utils.calculate_distance(route)
+
+        # Generate route description
+        route_description = generate_route_description(
+            start_point, 
+            end_point, 
+            route, 
+            path_distance,
+            estimated_cost,
+            terrain_analyzer,
+            criteria_weights
+        )
+        
+        # Calculate construction time in human-readable format
+        construction_time = calculate_construction_time(
+            path_distance,
+            terrain_difficulty,
+            pipe_diameter, 
+            pipe_type
+        )
+        
+        # Append route details to the result
+        result_paths.append({
+            'route': np.round(np.asarray(route, dtype=float), ROUTE_COORD_PRECISION).tolist(),
+            'metrics': metrics,
+            'total_distance': total_distance,
+            'estimated_cost': estimated_cost,
+            'terrain_difficulty': terrain_difficulty,
+            'environmental_impact': metrics.get('environmental_impact_score', None),
+            'construction_time': construction_time,
+            'route_description': route_description,
+            'alternative_num': metrics.get('alternative_num', 0)  # 0 for main route
+        })
+
+    return result_paths
 
 @app.route('/api/terrain', methods=['GET'])
 def get_terrain_data():
@@ -155,21 +343,26 @@ def get_terrain_data():
         west = float(request.args.get('west'))
 
         # Get terrain data for the area
-        terrain_data = terrain_analyzer.get_terrain_data(north, south, east, west)
+        terrain_data = _cached_terrain_data(
+            round(north, TERRAIN_BBOX_PRECISION),
+            round(south, TERRAIN_BBOX_PRECISION),
+            round(east, TERRAIN_BBOX_PRECISION),
+            round(west, TERRAIN_BBOX_PRECISION)
+        )
 
-        return jsonify({
+        return json_response({
             'success': True,
             'terrain_data': terrain_data
         })
 
     except Exception as e:
-        logger.error(f"Error getting terrain data: {str(e)}", exc_info=True)
-        return jsonify({
+        logger.error("Error getting terrain data: %s", e, exc_info=True)
+        return json_response({
             'success': False,
             'error': f'Произошла ошибка при получении данных о рельефе: {str(e)}'
-        }), 500
+        }, 500)
 
-def generate_route_description(start, end, route, metrics, terrain_analyzer, criteria_weights):
+def generate_route_description(start, end, route, total_distance, estimated_cost, terrain_analyzer, criteria_weights):
     """Generate a human-readable description of the route with detailed explanations."""
     # Start with basic information
     description = []
@@ -178,86 +371,24 @@ def generate_route_description(start, end, route, metrics, terrain_analyzer, cri
     direct_distance = route_planner.utils.haversine_distance(start, end)
 
     # Add introduction
-    description.append(f"Маршрут трубопровода: {route_planner.utils.format_distance(metrics['total_distance'])}.")
+    description.append(f"Маршрут трубопровода: {route_planner.utils.format_distance(total_distance)}.")
 
     # Compare to direct route
-    efficiency = direct_distance / metrics['total_distance'] if metrics['total_distance'] > 0 else 0
+    efficiency = direct_distance / total_distance if total_distance > 0 else 0
     if efficiency > 0.9:
         description.append(f"Маршрут близок к прямой линии (эффективность {efficiency:.0%}).")
     else:
         description.append(f"Маршрут отклоняется от прямой линии (эффективность {efficiency:.0%}) из-за особенностей рельефа.")
 
-    # Describe key features along the route
-    terrain_features = []
-    road_segments = 0
-    water_crossings = 0
-    difficult_terrain = 0
-
-    # Generate detailed turn-by-turn description
-    turns_description = []
-    prev_direction = None
-
-    # Analyze major turns and features
-    for i in range(1, len(route)):
-        if i == 1:
-            # First segment
+    if len(route) < 3:
+        # A route without intermediate points has no turns or features to explain
+        turns_description = []
+        if len(route) > 1:
             turns_description.append(f"Маршрут начинается от точки ({route[0][0]:.4f}, {route[0][1]:.4f}).")
-
-        prev = route[i-1]
-        current = route[i]
-
-        # Calculate direction change
-        if i > 1:
-            prev_prev = route[i-2]
-            angle1 = math.atan2(prev[0] - prev_prev[0], prev[1] - prev_prev[1])
-            angle2 = math.atan2(current[0] - prev[0], current[1] - prev[1])
-            angle_diff = abs(angle1 - angle2)
-
-            # If significant turn (more than ~15 degrees)
-            if angle_diff > 0.26:
-                # Determine turn reason
-                turn_reason = _determine_turn_reason(prev, current, terrain_analyzer)
-
-                # Direction in human terms (север, юг, etc.)
-                direction = _get_direction(prev, current)
-
-                if turn_reason:
-                    turns_description.append(f"На расстоянии {route_planner.utils.format_distance(route_planner.utils.haversine_distance(route[0], prev))} маршрут поворачивает на {direction} {turn_reason}.")
-
-        # Check for water crossings at this point
-        lat, lng = current
-        is_water, water_diff = terrain_analyzer.is_water_crossing(lat, lng)
-        if is_water:
-            water_crossings += 1
-            river_crossing_point = f"На расстоянии {route_planner.utils.format_distance(route_planner.utils.haversine_distance(route[0], current))} маршрут пересекает водную преграду."
-            if river_crossing_point not in turns_description:
-                turns_description.append(river_crossing_point)
-
-        # Check for road proximity
-        is_near_road, road_bonus = terrain_analyzer.near_road(lat, lng)
-        if is_near_road and road_bonus > 0:  # Only count if it's near road (not ON road)
-            road_segments += 1
-
-        # Check for difficult terrain
-        terrain_diff = terrain_analyzer.get_terrain_difficulty(lat, lng)
-        if terrain_diff > 0.7:
-            difficult_terrain += 1
-            difficult_point = f"На расстоянии {route_planner.utils.format_distance(route_planner.utils.haversine_distance(route[0], current))} маршрут проходит через участок сложного рельефа."
-            if difficult_point not in turns_description:
-                turns_description.append(difficult_point)
-
-    # Add endpoint description
-    turns_description.append(f"Маршрут заканчивается в точке ({route[-1][0]:.4f}, {route[-1][1]:.4f}).")
-
-    # Add descriptions based on route features
-    if water_crossings > 0:
-        terrain_features.append(f"{water_crossings} пересечений водных преград")
-
-    if difficult_terrain > 0:
-        terrain_features.append(f"{difficult_terrain} участков сложного рельефа")
-
-    if road_segments > len(route) * 0.3:
-        terrain_features.append(f"проходит вдоль дорог на {road_segments} участках")
+        turns_description.append(f"Маршрут заканчивается в точке ({route[-1][0]:.4f}, {route[-1][1]:.4f}).")
+        terrain_features = []
+    else:
+        turns_description, terrain_features = _describe_route_points(route, terrain_analyzer)
 
     # Explain route choice based on criteria weights
     weight_explanations = []
@@ -287,47 +418,128 @@ def generate_route_description(start, end, route, metrics, terrain_analyzer, cri
         description.extend(turns_description)
 
     # Construction and cost information
-    description.append(f"Ориентировочная стоимость строительства: {route_planner.utils.format_cost(metrics['estimated_cost'])} млн руб.")
+    description.append(f"Ориентировочная стоимость строительства: {route_planner.utils.format_cost(estimated_cost)} млн руб.")
 
     return " ".join(description)
 
-def _determine_turn_reason(prev, current, terrain_analyzer):
-    """Determine the reason for a turn in the route."""
-    lat, lng = prev
-    new_lat, new_lng = current
+def _describe_route_points(route, terrain_analyzer):
+    """
+    Describe the turns and terrain features of a route with at least 3 points.
+
+    Returns:
+        Tuple of (turn-by-turn sentences, list of route feature summaries)
+    """
+    # Generate detailed turn-by-turn description
+    turns_description = []
+    # Feature sentences already added, to avoid repeating the same point
+    seen_points = set()
+
+    # Route geometry is computed for all points at once:
+    # distance along the route to every point and heading of every segment
+    points = np.asarray(route, dtype=np.float64).reshape(-1, 2)
+    cum_dist = route_planner.utils.cumulative_distance(points)
+    segments = np.diff(points, axis=0)
+    angles = np.arctan2(segments[:, 0], segments[:, 1])
+
+    # turn_mask[i] is True if the route changes direction at point i
+    # by a significant angle (more than ~15 degrees)
+    turn_mask = np.zeros(len(route), dtype=bool)
+    turn_mask[1:-1] = np.abs(np.diff(angles)) > 0.26
+
+    # Direction in human terms (север, юг, etc.) of every segment
+    directions = _get_directions(segments)
+
+    # Terrain features for every route point, queried in one batch
+    features = terrain_analyzer.query_batch(points[:, 0], points[:, 1])
+    water_mask = features.water_mask
+    difficult_mask = features.difficulty > 0.7
+
+    # The start point itself is not counted as a feature of the route
+    water_crossings = int(water_mask[1:].sum())
+    # Only count points near a road (not ON the road)
+    road_segments = int((features.road_mask[1:] & (features.road_bonus[1:] > 0)).sum())
+    difficult_terrain = int(difficult_mask[1:].sum())
+
+    turns_description.append(f"Маршрут начинается от точки ({route[0][0]:.4f}, {route[0][1]:.4f}).")
+
+    # Segments leaving a turn point are explained by the terrain at their midpoint,
+    # which is also queried in one batch
+    turn_segments = np.flatnonzero(turn_mask[:-1]) + 1
+    midpoints = (points[turn_segments - 1] + points[turn_segments]) * 0.5
+    midpoint_features = terrain_analyzer.query_batch(midpoints[:, 0], midpoints[:, 1])
+    midpoint_index = {i: j for j, i in enumerate(turn_segments.tolist())}
+
+    # Only points with a turn or a notable terrain feature need a description
+    notable = np.zeros(len(route), dtype=bool)
+    notable[1:] = turn_mask[:-1] | water_mask[1:] | difficult_mask[1:]
+    for i in np.flatnonzero(notable).tolist():
+        if turn_mask[i-1]:
+            # Determine turn reason
+            turn_reason = _determine_turn_reason(i, features, midpoint_index[i], midpoint_features)
+
+            if turn_reason:
+                turns_description.append(f"На расстоянии {route_planner.utils.format_distance(cum_dist[i-1])} маршрут поворачивает на {directions[i-1]} {turn_reason}.")
+
+        # Check for water crossings at this point
+        if water_mask[i]:
+            river_crossing_point = f"На расстоянии {route_planner.utils.format_distance(cum_dist[i])} маршрут пересекает водную преграду."
+            if river_crossing_point not in seen_points:
+                seen_points.add(river_crossing_point)
+                turns_description.append(river_crossing_point)
+
+        # Check for difficult terrain
+        if difficult_mask[i]:
+            difficult_point = f"На расстоянии {route_planner.utils.format_distance(cum_dist[i])} маршрут проходит через участок сложного рельефа."
+            if difficult_point not in seen_points:
+                seen_points.add(difficult_point)
+                turns_description.append(difficult_point)
+
+    # Add endpoint description
+    turns_description.append(f"Маршрут заканчивается в точке ({route[-1][0]:.4f}, {route[-1][1]:.4f}).")
 
+    # Describe key features along the route
+    terrain_features = []
+    if water_crossings > 0:
+        terrain_features.append(f"{water_crossings} пересечений водных преград")
+
+    if difficult_terrain > 0:
+        terrain_features.append(f"{difficult_terrain} участков сложного рельефа")
+
+    if road_segments > len(route) * 0.3:
+        terrain_features.append(f"проходит вдоль дорог на {road_segments} участках")
+
+    return turns_description, terrain_features
+
+def _determine_turn_reason(i, features, j, midpoint_features):
+    """
+    Determine the reason for a turn in the route on the segment ending at point i.
+
+    `features` holds the terrain features of every route point and
+    `midpoint_features[j]` those of the segment midpoint, so no terrain
+    queries are made here.
+    """
     # Check for water bodies
-    is_water, _ = terrain_analyzer.is_water_crossing(new_lat, new_lng)
-    if is_water:
+    if features.water_mask[i]:
         return "для пересечения водной преграды"
 
     # Check if coming near a road
-    is_near_road, road_bonus = terrain_analyzer.near_road(new_lat, new_lng)
-    if is_near_road and road_bonus > 0:
+    if features.road_mask[i] and features.road_bonus[i] > 0:
         return "для следования вдоль дороги"
 
     # Check if avoiding a road (negative bonus = on the road)
-    is_on_road, road_penalty = terrain_analyzer.near_road(lat + (new_lat - lat) * 0.5, lng + (new_lng - lng) * 0.5)
-    if is_on_road and road_penalty < 0:
+    if midpoint_features.road_mask[j] and midpoint_features.road_bonus[j] < 0:
         return "для обхода дороги"
 
     # Check for difficult terrain
-    difficulty_prev = terrain_analyzer.get_terrain_difficulty(lat, lng)
-    difficulty_current = terrain_analyzer.get_terrain_difficulty(new_lat, new_lng)
-    difficulty_between = terrain_analyzer.get_terrain_difficulty(
-        lat + (new_lat - lat) * 0.5, 
-        lng + (new_lng - lng) * 0.5
-    )
+    difficulty_prev = features.difficulty[i-1]
+    difficulty_current = features.difficulty[i]
+    difficulty_between = midpoint_features.difficulty[j]
 
     if difficulty_between > difficulty_current + 0.2:
         return "для обхода сложного участка рельефа"
 
     # Check for settlement nearby
-    is_settlement, _ = terrain_analyzer.near_settlement(
-        lat + (new_lat - lat) * 0.5, 
-        lng + (new_lng - lng) * 0.5
-    )
-    if is_settlement:
+    if midpoint_features.settlement_mask[j]:
         return "для обхода населенного пункта"
 
     # Default explanation
@@ -336,49 +548,52 @@ def _determine_turn_reason(prev, current, terrain_analyzer):
 
     return "согласно критериям оптимизации"
 
+# Directions indexed by 2 * (North-South is dominant) + (heading is negative)
+_DIRECTIONS = ("восток", "запад", "север", "юг")
+_DIRECTIONS_ARR = np.array(_DIRECTIONS)
+
 def _get_direction(prev, current):
     """Get human-readable direction from one point to another."""
     lat_diff = current[0] - prev[0]
     lng_diff = current[1] - prev[1]
 
-    # Determine the dominant direction
-    if abs(lat_diff) > abs(lng_diff):
-        # North-South is dominant
-        if lat_diff > 0:
-            return "север"
-        else:
-            return "юг"
-    else:
-        # East-West is dominant
-        if lng_diff > 0:
-            return "восток"
-        else:
-            return "запад"
-
-
-def calculate_construction_time(metrics, pipe_diameter, pipe_type):
-    """Calculate estimated construction time based on route metrics."""
-    # Base construction rate (km per day)
-    if pipe_diameter <= 300:  # Small diameter
-        base_rate = 0.5
-    elif pipe_diameter <= 700:  # Medium diameter
-        base_rate = 0.3
-    else:  # Large diameter
-        base_rate = 0.2
-
-    # Adjust for pipe type
-    type_factors = {
-        'oil': 1.0,
-        'gas': 1.2,  # Gas pipelines take longer
-        'water': 0.9  # Water pipelines can be faster
-    }
-
-    # Factor in terrain difficulty
-    terrain_factor = 1.0 + metrics['terrain_difficulty_score']
-
-    # Calculate days needed
-    total_distance = metrics['total_distance']
-    days_needed = (total_distance / base_rate) * terrain_factor * type_factors.get(pipe_type, 1.0)
+    vertical = abs(lat_diff) > abs(lng_diff)
+    negative = (lat_diff if vertical else lng_diff) <= 0
+    return _DIRECTIONS[vertical * 2 + negative]
+
+def _get_directions(segments):
+    """Get human-readable directions for an (N, 2) array of (lat, lng) differences."""
+    lat_diff = segments[:, 0]
+    lng_diff = segments[:, 1]
+
+    vertical = np.abs(lat_diff) > np.abs(lng_diff)
+    negative = np.where(vertical, lat_diff <= 0, lng_diff <= 0)
+    index = vertical.astype(np.int8) * 2 + negative.astype(np.int8)
+    return np.take(_DIRECTIONS_ARR, index)
+
+
+# Construction days per km of pipeline by (diameter class, pipe type):
+# base rate of 0.5 / 0.3 / 0.2 km per day for small (<= 300 mm), medium (<= 700 mm)
+# and large pipes, adjusted for the pipe type (gas pipelines take longer,
+# water pipelines can be faster). Unknown pipe types use the base rate.
+_CONSTRUCTION_BASE_RATES = (0.5, 0.3, 0.2)
+_CONSTRUCTION_TYPE_FACTORS = {'oil': 1.0, 'gas': 1.2, 'water': 0.9, None: 1.0}
+_CONSTRUCTION_DAYS_PER_KM = {
+    (bucket, pipe_type): type_factor / base_rate
+    for bucket, base_rate in enumerate(_CONSTRUCTION_BASE_RATES)
+    for pipe_type, type_factor in _CONSTRUCTION_TYPE_FACTORS.items()
+}
+
+def calculate_construction_time(total_distance, terrain_difficulty_score, pipe_diameter, pipe_type):
+    """Calculate estimated construction time from the route length and terrain difficulty."""
+    # Diameter class for the construction rate
+    bucket = 0 if pipe_diameter <= 300 else 1 if pipe_diameter <= 700 else 2
+    if pipe_type not in _CONSTRUCTION_TYPE_FACTORS:
+        pipe_type = None
+
+    # Calculate days needed, factoring in terrain difficulty
+    terrain_factor = 1.0 + terrain_difficulty_score
+    days_needed = total_distance * _CONSTRUCTION_DAYS_PER_KM[(bucket, pipe_type)] * terrain_factor
 
     # Add additional days for water crossings and complex construction
     days_needed = math.ceil(days_needed)
@@ -0,0 +1,90 @@
+"""
+4-ary min-heap over preallocated NumPy arrays.
+
+Entries are ordered by (key, seq) and carry an integer item. Each level has
+four children, so a sift takes half as many levels as in a binary heap.
+The functions are compiled with Numba when it is installed.
+"""
+
+import numpy as np
+
+from route_planner._jit import njit
+
+@njit(cache=True)
+def _less(keys: np.ndarray, seqs: np.ndarray, a: int, b: int) -> bool:
+    """Check if entry a sorts before entry b."""
+    return keys[a] < keys[b] or (keys[a] == keys[b] and seqs[a] < seqs[b])
+
+@njit(cache=True)
+def _swap(keys: np.ndarray, seqs: np.ndarray, items: np.ndarray, a: int, b: int) -> None:
+    """Swap entries a and b."""
+    keys[a], keys[b] = keys[b], keys[a]
+    seqs[a], seqs[b] = seqs[b], seqs[a]
+    items[a], items[b] = items[b], items[a]
+
+@njit(cache=True)
+def push(keys: np.ndarray, seqs: np.ndarray, items: np.ndarray, n: int,
+         key: float, seq: int, item: int) -> int:
+    """
+    Add an entry to a heap of n entries.
+
+    Args:
+        keys, seqs, items: Heap arrays, with room for at least n + 1 entries
+        n: Number of entries in the heap
+        key: Sort key of the new entry
+        seq: Tie-breaker for equal keys
+        item: Payload of the new entry
+
+    Returns:
+        New number of entries
+    """
+    keys[n] = key
+    seqs[n] = seq
+    items[n] = item
+
+    # Sift up
+    child = n
+    while child > 0:
+        parent = (child - 1) >> 2
+        if not _less(keys, seqs, child, parent):
+            break
+        _swap(keys, seqs, items, child, parent)
+        child = parent
+    return n + 1
+
+@njit(cache=True)
+def pop(keys: np.ndarray, seqs: np.ndarray, items: np.ndarray, n: int):
+    """
+    Remove the smallest entry from a non-empty heap of n entries.
+
+    Args:
+        keys, seqs, items: Heap arrays
+        n: Number of entries in the heap
+
+    Returns:
+        Tuple of (key, seq, item, new number of entries)
+    """
+    key = keys[0]
+    seq = seqs[0]
+    item = items[0]
+    n -= 1
+    keys[0] = keys[n]
+    seqs[0] = seqs[n]
+    items[0] = items[n]
+
+    # Sift down, comparing the four children of each level
+    parent = 0
+    while True:
+        first = (parent << 2) + 1
+        if first >= n:
+            break
+        smallest = first
+        last = min(first + 4, n)
+        for child in range(first + 1, last):
+            if _less(keys, seqs, child, smallest):
+                smallest = child
+        if not _less(keys, seqs, smallest, parent):
+            break
+        _swap(keys, seqs, items, smallest, parent)
+        parent = smallest
+    return key, seq, item, n
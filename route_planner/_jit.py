@@ -0,0 +1,26 @@
+"""
+Optional JIT compilation support for route planning kernels.
+
+Numba is used when it is installed. Without it the decorated functions
+run as plain Python, so every kernel must also be valid Python code.
+"""
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:  # pragma: no cover - depends on the environment
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """No-op replacement for numba.njit."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+    prange = range
+
+__all__ = ['HAVE_NUMBA', 'njit', 'prange']
@@ -5,29 +5,456 @@ This module provides the core algorithm for finding optimal pipeline routes
 based on multiple weighted criteria like distance, terrain, cost, etc.
 """
 
+import copy
 import heapq
+import itertools
 import math
 import logging
 import numpy as np
-from typing import Dict, List, Tuple, Set, Optional, Any, Union
-
-from route_planner.costs import calculate_construction_cost, calculate_environmental_impact
-from route_planner.terrain import TerrainAnalyzer
-from route_planner.utils import calculate_distance, haversine_distance
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Set, Optional, Any, NamedTuple
+
+from route_planner import _heap4
+from route_planner._jit import HAVE_NUMBA, njit
+from route_planner.costs import (SegmentBatch, calculate_all_costs, calculate_construction_cost_batch,
+                                 calculate_environmental_impact_batch, encode_material, encode_pipe_type,
+                                 score_segments)
+from route_planner.terrain import TerrainAnalyzer, TerrainGrid
+from route_planner.utils import (calculate_distance, cumulative_distance, haversine_distance,
+                                 equirectangular_to_point, _equirectangular_scalar)
 
 logger = logging.getLogger(__name__)
 
+# Route optimization criteria, in the order used by cost vectors
+CRITERIA = ('distance', 'terrain_difficulty', 'environmental_impact', 'construction_cost', 'maintenance_access')
+DISTANCE, TERRAIN_DIFFICULTY, ENVIRONMENTAL_IMPACT, CONSTRUCTION_COST, MAINTENANCE_ACCESS = range(len(CRITERIA))
+
+def _make_combine(weights: np.ndarray):
+    """
+    Build a function that combines a cost vector into a weighted cost.
+
+    For the five criteria the weights are bound as Python floats and the sum
+    is written out, which is faster than a NumPy dot product of such short
+    vectors. Other lengths fall back to the dot product.
+    """
+    if len(weights) != 5:
+        return lambda costs: float(costs @ weights)
+
+    w0, w1, w2, w3, w4 = weights.tolist()
+
+    def combine(costs: np.ndarray) -> float:
+        c0, c1, c2, c3, c4 = costs.tolist()
+        return c0 * w0 + c1 * w1 + c2 * w2 + c3 * w3 + c4 * w4
+
+    return combine
+
+class SearchGrid(NamedTuple):
+    """Terrain and per-cell costs sampled around the start and goal for the grid search."""
+    lats: np.ndarray
+    lngs: np.ndarray
+    start_index: Tuple[int, int]
+    terrain: TerrainGrid
+    environmental_impact: np.ndarray
+    construction_cost_per_km: np.ndarray
+    goal_values: np.ndarray  # difficulty, accessibility, environmental impact, cost per km at the goal
+
+@njit(cache=True)
+def _add_edge_costs(g_prev, d, terrain, access, impact, cost_per_km, weights, out):
+    """
+    Add the costs of a grid edge to g-scores, as in calculate_edge_cost.
+
+    Args:
+        g_prev: G-scores at the start of the edge
+        d: Edge length in kilometers
+        terrain, access, impact, cost_per_km: Terrain difficulty,
+            accessibility, environmental impact and construction cost per km
+            of the cell the edge enters
+        weights: Criteria weights
+        out: Array to write the new g-scores into
+
+    Returns:
+        Combined weighted cost of the new g-scores
+    """
+    out[0] = g_prev[0] + d
+    out[1] = g_prev[1] + d * (1 + terrain)
+    out[2] = g_prev[2] + impact
+    out[3] = g_prev[3] + cost_per_km * d
+    out[4] = g_prev[4] + d * (1 + (1.0 - access))
+    combined = 0.0
+    for c in range(5):
+        combined += out[c] * weights[c]
+    return combined
+
+@njit(cache=True, nogil=True)
+def _astar_core(lats, lngs, difficulty, accessibility, valid, environmental_impact,
+                construction_cost_per_km, start_i, start_j, goal_lat, goal_lng,
+                goal_values, weights, step, max_iterations):
+    """
+    Run the grid A* search on pre-sampled terrain arrays.
+
+    Grid node k is the cell (k // width, k % width) and node height * width
+    is the goal. The search follows _find_single_path: 8-connected moves,
+    the goal added as a neighbor when close, and a doubled step after 5000
+    iterations.
+
+    Returns:
+        Tuple of (node indices of the path from the start to the last node
+        before the goal, g-scores at the goal, number of iterations). The
+        path is empty when no path was found.
+    """
+    height, width = difficulty.shape
+    goal = height * width
+    cos_lat0 = math.cos(math.radians((lats[start_i] + goal_lat) / 2))
+    g = np.zeros((goal + 1, 5))
+    g_combined = np.full(goal + 1, np.inf)
+    f = np.full(goal + 1, np.inf)
+    parent = np.full(goal + 1, -1, dtype=np.int64)
+    closed = np.zeros(goal + 1, dtype=np.bool_)
+    neighbors = np.empty(9, dtype=np.int64)
+    new_g = np.empty(5)
+
+    start = start_i * width + start_j
+    g_combined[start] = 0.0
+    f[start] = (_equirectangular_scalar(lats[start_i], lngs[start_j], goal_lat, goal_lng, cos_lat0)
+                * (1 + difficulty[start_i, start_j] * 0.3))
+    # Open set as a 4-ary heap of (f_score, counter, node); every expansion
+    # pushes at most 9 entries
+    capacity = max_iterations * 9 + 1
+    heap_f = np.empty(capacity)
+    heap_seq = np.empty(capacity, dtype=np.int64)
+    heap_node = np.empty(capacity, dtype=np.int64)
+    heap_size = _heap4.push(heap_f, heap_seq, heap_node, 0, f[start], 0, start)
+    counter = 1
+    iterations = 0
+    cells = 1  # Neighbor step in grid cells
+
+    while heap_size > 0 and iterations < max_iterations:
+        f_score, _, node, heap_size = _heap4.pop(heap_f, heap_seq, heap_node, heap_size)
+        if f_score > f[node] or closed[node]:
+            continue
+        iterations += 1
+
+        # Double the step for long searches
+        if iterations % 1000 == 0 and iterations > 5000 and cells == 1:
+            cells = 2
+        current_step = step * cells
+
+        i = -1
+        j = -1
+        if node == goal:
+            lat = goal_lat
+            lng = goal_lng
+        else:
+            i = node // width
+            j = node % width
+            lat = lats[i]
+            lng = lngs[j]
+
+        # Reached the goal: add the final edge to the exact goal position
+        dist_to_goal = _equirectangular_scalar(lat, lng, goal_lat, goal_lng, cos_lat0)
+        if dist_to_goal < current_step * 2:
+            final_g = np.empty(5)
+            _add_edge_costs(g[node], dist_to_goal, goal_values[0], goal_values[1],
+                            goal_values[2], goal_values[3], weights, final_g)
+
+            length = 1
+            k = node
+            while parent[k] >= 0:
+                k = parent[k]
+                length += 1
+            path = np.empty(length, dtype=np.int64)
+            k = node
+            for n in range(length - 1, -1, -1):
+                path[n] = k
+                k = parent[k]
+            return path, final_g, iterations
+
+        closed[node] = True
+
+        # Collect neighbors; forbidden cells are only allowed right next to the goal
+        count = 0
+        for di in (-cells, 0, cells):
+            ni = i + di
+            if ni < 0 or ni >= height:
+                continue
+            for dj in (-cells, 0, cells):
+                nj = j + dj
+                if (di == 0 and dj == 0) or nj < 0 or nj >= width:
+                    continue
+                if not valid[ni, nj] and _equirectangular_scalar(lats[ni], lngs[nj], goal_lat, goal_lng, cos_lat0) >= current_step * 3:
+                    continue
+                neighbors[count] = ni * width + nj
+                count += 1
+        if dist_to_goal < current_step * 4:
+            neighbors[count] = goal
+            count += 1
+
+        for n in range(count):
+            neighbor = neighbors[n]
+            if closed[neighbor]:
+                continue
+
+            if neighbor == goal:
+                n_lat = goal_lat
+                n_lng = goal_lng
+                terrain = goal_values[0]
+                access = goal_values[1]
+                impact = goal_values[2]
+                cost_per_km = goal_values[3]
+            else:
+                ni = neighbor // width
+                nj = neighbor % width
+                n_lat = lats[ni]
+                n_lng = lngs[nj]
+                terrain = difficulty[ni, nj]
+                access = accessibility[ni, nj]
+                impact = environmental_impact[ni, nj]
+                cost_per_km = construction_cost_per_km[ni, nj]
+
+            d = _equirectangular_scalar(lat, lng, n_lat, n_lng, cos_lat0)
+            combined = _add_edge_costs(g[node], d, terrain, access, impact, cost_per_km, weights, new_g)
+
+            if combined < g_combined[neighbor]:
+                g[neighbor] = new_g
+                g_combined[neighbor] = combined
+                parent[neighbor] = node
+                f[neighbor] = combined + _equirectangular_scalar(n_lat, n_lng, goal_lat, goal_lng, cos_lat0) * (1 + terrain * 0.3)
+                heap_size = _heap4.push(heap_f, heap_seq, heap_node, heap_size, f[neighbor], counter, neighbor)
+                counter += 1
+
+    return np.empty(0, dtype=np.int64), np.zeros(5), iterations
+
+@njit(cache=True, nogil=True)
+def _bidirectional_core(lats, lngs, difficulty, accessibility, valid, environmental_impact,
+                        construction_cost_per_km, start_i, start_j, goal_lat, goal_lng,
+                        goal_values, weights, step, max_iterations):
+    """
+    Run a bidirectional grid A* search on pre-sampled terrain arrays.
+
+    Takes the same arguments and returns the same values as _astar_core,
+    on the same graph. A forward search from the start and a backward
+    search from the goal are expanded in turn. Both are keyed by balanced
+    potentials, (h_forward - h_backward) / 2 and its negative, so the
+    search can stop as soon as the smallest keys of the two open sets add
+    up to the cost of the best meeting point found so far.
+    """
+    height, width = difficulty.shape
+    goal = height * width
+    cos_lat0 = math.cos(math.radians((lats[start_i] + goal_lat) / 2))
+    size = goal + 1
+    FORWARD = 0
+    BACKWARD = 1
+
+    # Per-direction search state; backward g-scores are costs to the goal
+    g = np.zeros((2, size, 5))
+    g_combined = np.full((2, size), np.inf)
+    f = np.full((2, size), np.inf)
+    parent = np.full((2, size), -1, dtype=np.int64)
+    closed = np.zeros((2, size), dtype=np.bool_)
+    # Room for the predecessors of the goal, scanned within 4 steps of it;
+    # a step is at most 2 cells
+    neighbors = np.empty((2 * 4 * 2 + 1)**2, dtype=np.int64)
+    new_g = np.empty(5)
+
+    capacity = max_iterations * 9 + 1
+    heap_f = np.empty((2, capacity))
+    heap_seq = np.empty((2, capacity), dtype=np.int64)
+    heap_node = np.empty((2, capacity), dtype=np.int64)
+    heap_size = np.zeros(2, dtype=np.int64)
+
+    start = start_i * width + start_j
+    start_lat = lats[start_i]
+    start_lng = lngs[start_j]
+    g_combined[FORWARD, start] = 0.0
+    f[FORWARD, start] = (_equirectangular_scalar(start_lat, start_lng, goal_lat, goal_lng, cos_lat0)
+                         * (1 + difficulty[start_i, start_j] * 0.3)) * 0.5
+    heap_size[FORWARD] = _heap4.push(heap_f[FORWARD], heap_seq[FORWARD], heap_node[FORWARD], 0,
+                                     f[FORWARD, start], 0, start)
+    g_combined[BACKWARD, goal] = 0.0
+    f[BACKWARD, goal] = (_equirectangular_scalar(goal_lat, goal_lng, start_lat, start_lng, cos_lat0)
+                         * (1 + goal_values[0] * 0.3)) * 0.5
+    heap_size[BACKWARD] = _heap4.push(heap_f[BACKWARD], heap_seq[BACKWARD], heap_node[BACKWARD], 0,
+                                      f[BACKWARD, goal], 1, goal)
+    counter = 2
+
+    # Grid cell nearest to the goal, whose neighborhood is linked to the goal
+    goal_i = int(round((goal_lat - lats[0]) / step))
+    goal_j = int(round((goal_lng - lngs[0]) / step))
+
+    best = np.inf
+    meeting = -1
+    iterations = 0
+    cells = 1  # Neighbor step in grid cells
+    side = BACKWARD
+
+    while heap_size[FORWARD] > 0 and heap_size[BACKWARD] > 0 and iterations < max_iterations:
+        if heap_f[FORWARD, 0] + heap_f[BACKWARD, 0] >= best:
+            break
+
+        side = 1 - side
+        other = 1 - side
+        f_score, _, node, size_left = _heap4.pop(heap_f[side], heap_seq[side], heap_node[side], heap_size[side])
+        heap_size[side] = size_left
+        if f_score > f[side, node] or closed[side, node]:
+            continue
+        iterations += 1
+
+        # Double the step for long searches
+        if iterations % 1000 == 0 and iterations > 5000 and cells == 1:
+            cells = 2
+        current_step = step * cells
+
+        i = -1
+        j = -1
+        if node == goal:
+            lat = goal_lat
+            lng = goal_lng
+        else:
+            i = node // width
+            j = node % width
+            lat = lats[i]
+            lng = lngs[j]
+        dist_to_goal = _equirectangular_scalar(lat, lng, goal_lat, goal_lng, cos_lat0)
+        closed[side, node] = True
+
+        count = 0
+        if side == FORWARD:
+            # Successors, as in _astar_core
+            if node != goal:
+                for di in (-cells, 0, cells):
+                    ni = i + di
+                    if ni < 0 or ni >= height:
+                        continue
+                    for dj in (-cells, 0, cells):
+                        nj = j + dj
+                        if (di == 0 and dj == 0) or nj < 0 or nj >= width:
+                            continue
+                        if not valid[ni, nj] and _equirectangular_scalar(lats[ni], lngs[nj], goal_lat, goal_lng, cos_lat0) >= current_step * 3:
+                            continue
+                        neighbors[count] = ni * width + nj
+                        count += 1
+                if dist_to_goal < current_step * 4:
+                    neighbors[count] = goal
+                    count += 1
+        elif node == goal:
+            # Predecessors of the goal: grid cells close enough to link to it. The
+            # forward search links cells closer than 4 steps, so scan that far
+            radius = 4 * cells
+            for ni in range(max(goal_i - radius, 0), min(goal_i + radius + 1, height)):
+                for nj in range(max(goal_j - radius, 0), min(goal_j + radius + 1, width)):
+                    if _equirectangular_scalar(lats[ni], lngs[nj], goal_lat, goal_lng, cos_lat0) < current_step * 4:
+                        neighbors[count] = ni * width + nj
+                        count += 1
+        elif valid[i, j] or dist_to_goal < current_step * 3:
+            # Predecessors of a cell that can be entered: all cells around it
+            for di in (-cells, 0, cells):
+                ni = i + di
+                if ni < 0 or ni >= height:
+                    continue
+                for dj in (-cells, 0, cells):
+                    nj = j + dj
+                    if (di == 0 and dj == 0) or nj < 0 or nj >= width:
+                        continue
+                    neighbors[count] = ni * width + nj
+                    count += 1
+
+        for n in range(count):
+            neighbor = neighbors[n]
+            if closed[side, neighbor]:
+                continue
+
+            if neighbor == goal:
+                n_lat = goal_lat
+                n_lng = goal_lng
+                n_terrain = goal_values[0]
+            else:
+                ni = neighbor // width
+                nj = neighbor % width
+                n_lat = lats[ni]
+                n_lng = lngs[nj]
+                n_terrain = difficulty[ni, nj]
+
+            # Edge costs depend on the cell the edge enters
+            if side == FORWARD:
+                target = neighbor
+            else:
+                target = node
+            if target == goal:
+                terrain = goal_values[0]
+                access = goal_values[1]
+                impact = goal_values[2]
+                cost_per_km = goal_values[3]
+            else:
+                ti = target // width
+                tj = target % width
+                terrain = difficulty[ti, tj]
+                access = accessibility[ti, tj]
+                impact = environmental_impact[ti, tj]
+                cost_per_km = construction_cost_per_km[ti, tj]
+
+            d = _equirectangular_scalar(lat, lng, n_lat, n_lng, cos_lat0)
+            combined = _add_edge_costs(g[side, node], d, terrain, access, impact, cost_per_km, weights, new_g)
+
+            if combined < g_combined[side, neighbor]:
+                g[side, neighbor] = new_g
+                g_combined[side, neighbor] = combined
+                parent[side, neighbor] = node
+                potential = ((_equirectangular_scalar(n_lat, n_lng, goal_lat, goal_lng, cos_lat0)
+                              - _equirectangular_scalar(n_lat, n_lng, start_lat, start_lng, cos_lat0))
+                             * (1 + n_terrain * 0.3) * 0.5)
+                if side == BACKWARD:
+                    potential = -potential
+                f[side, neighbor] = combined + potential
+                heap_size[side] = _heap4.push(heap_f[side], heap_seq[side], heap_node[side], heap_size[side],
+                                              f[side, neighbor], counter, neighbor)
+                counter += 1
+
+                # The neighbor links both searches: a candidate path
+                if combined + g_combined[other, neighbor] < best:
+                    best = combined + g_combined[other, neighbor]
+                    meeting = neighbor
+
+    if meeting < 0:
+        return np.empty(0, dtype=np.int64), np.zeros(5), iterations
+
+    # Forward part of the path up to the meeting node, then the backward part
+    forward_length = 1
+    k = meeting
+    while parent[FORWARD, k] >= 0:
+        k = parent[FORWARD, k]
+        forward_length += 1
+    backward_length = 0
+    k = meeting
+    while parent[BACKWARD, k] >= 0:
+        k = parent[BACKWARD, k]
+        backward_length += 1
+
+    path = np.empty(forward_length + backward_length, dtype=np.int64)
+    k = meeting
+    for n in range(forward_length - 1, -1, -1):
+        path[n] = k
+        k = parent[FORWARD, k]
+    k = meeting
+    for n in range(forward_length, forward_length + backward_length):
+        k = parent[BACKWARD, k]
+        path[n] = k
+
+    # The path always ends at the goal, which the caller appends
+    return path[:-1].copy(), g[FORWARD, meeting] + g[BACKWARD, meeting], iterations
+
 class Node:
     """A node in the search graph for A* algorithm."""
 
-    def __init__(self, position: Tuple[float, float], g_score: Dict[str, float], 
+    __slots__ = ('position', 'g_score', 'f_score', 'parent')
+
+    def __init__(self, position: Tuple[float, float], g_score: np.ndarray, 
                  parent: Optional['Node'] = None):
         """
         Initialize a node.
 
         Args:
             position: Tuple of (latitude, longitude) coordinates
-            g_score: Dictionary of g-scores for each criterion
+            g_score: Array of g-scores for each criterion, in CRITERIA order
             parent: Parent node in the path
         """
         self.position = position
@@ -35,10 +462,6 @@ class Node:
         self.f_score = 0.0  # Will be calculated in the algorithm
         self.parent = parent
 
-    def __lt__(self, other: 'Node') -> bool:
-        """Compare nodes based on f_score for priority queue."""
-        return self.f_score < other.f_score
-
     def __eq__(self, other: object) -> bool:
         """Check if two nodes are at the same position."""
         if not isinstance(other, Node):
@@ -52,6 +475,13 @@ class Node:
 class MultiCriteriaAStar:
     """Multi-criteria A* algorithm for finding optimal pipeline routes."""
 
+    # Grid cell offsets of the 8 neighbors, in the order they are explored
+    NEIGHBOR_OFFSETS = np.array([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+
+    # Offsets of the alternatives sampled around a waypoint: 8 directions about 200m away
+    WAYPOINT_SAMPLE_OFFSETS = 0.002 * np.stack(
+        (np.sin(np.radians(np.arange(0, 360, 45))), np.cos(np.radians(np.arange(0, 360, 45)))), axis=1)
+
     def __init__(self, start: Tuple[float, float], goal: Tuple[float, float], 
                  terrain_analyzer: TerrainAnalyzer, pipe_diameter: float,
                  pipe_material: str, max_pressure: float, pipe_type: str,
@@ -76,22 +506,60 @@ class MultiCriteriaAStar:
         self.pipe_material = pipe_material
         self.max_pressure = max_pressure
         self.pipe_type = pipe_type
-        self.criteria_weights = criteria_weights
+        self._set_criteria_weights(criteria_weights)
+
+        # Cost model codes of the pipe, resolved once instead of per segment
+        self._material_code = encode_material(pipe_material)
+        self._pipe_type_code = encode_pipe_type(pipe_type)
 
         # Constants
         self.grid_size = 0.0005  # Grid cell size in degrees (~50m)
         self.max_neighbors = 8  # Number of neighbors to consider (8 for all directions)
         self.max_iterations = 20000  # Increased maximum iterations
+        self.bidirectional_threshold = 1.5  # Grid searches longer than this (km) run from both ends
+
+        # Extra grid cells sampled around the start-goal bounding box for the grid search
+        self.search_grid_padding = 16
 
-        # Cache for cost calculations
-        self.terrain_cache = {}
+        # Terrain sampled on the search grid, see _get_search_grid
+        self._search_grid = None
+        self._goal_terrain_factor = None
+        self._inv_grid_size = 1.0 / self.grid_size
+
+        # Cosine of the mid latitude for the equirectangular distance, see _fast_distance
+        self._cos_lat0 = math.cos(math.radians((start[0] + goal[0]) / 2))
 
         logger.info(f"Initialized MultiCriteriaAStar: start={start}, goal={goal}, pipe_type={pipe_type}")
 
+    def _set_criteria_weights(self, criteria_weights: Dict[str, float]) -> None:
+        """Set the criteria weights, their vector in CRITERIA order and the suitability weights."""
+        self.criteria_weights = criteria_weights
+        self._weights = np.array([criteria_weights.get(criterion, 0.0) for criterion in CRITERIA])
+        self._combine = _make_combine(self._weights)
+
+        # Weights of road, water, environmental and cost factors in _evaluate_point_suitability
+        self._suitability_weights = (
+            criteria_weights.get('maintenance_access', 0.15) * 3.0,
+            criteria_weights.get('terrain_difficulty', 0.2) * 3.0,
+            criteria_weights.get('environmental_impact', 0.15) * 3.0,
+            criteria_weights.get('construction_cost', 0.2) * 3.0,
+        )
+
+    def _fast_distance(self, point1: Tuple[float, float], point2: Tuple[float, float]) -> float:
+        """
+        Approximate the distance between two points in kilometers.
+
+        Uses the equirectangular projection around the mid latitude of the
+        start and goal, which is cheaper than the haversine formula and
+        accurate enough within a route. Reported metrics keep using the
+        haversine distance.
+        """
+        return _equirectangular_scalar(point1[0], point1[1], point2[0], point2[1], self._cos_lat0)
+
     def calculate_h_score(self, position: Tuple[float, float]) -> float:
         """
         Calculate the heuristic score (h-score) for a position.
-        Uses haversine distance as the base heuristic.
+        Uses the equirectangular distance as the base heuristic.
 
         Args:
             position: Current position (latitude, longitude)
@@ -100,7 +568,7 @@ class MultiCriteriaAStar:
             Estimated cost to goal
         """
         # Basic distance heuristic
-        distance_to_goal = haversine_distance(position, self.goal)
+        distance_to_goal = self._fast_distance(position, self.goal)
 
         # Apply terrain-based heuristic modifier
         terrain_factor = self._get_terrain_factor(position)
@@ -110,6 +578,31 @@ class MultiCriteriaAStar:
 
         return h_score
 
+    def _grid_cell(self, position: Tuple[float, float]) -> Optional[Tuple[int, int]]:
+        """
+        Get the search grid cell at a position.
+
+        Args:
+            position: Position to look up (latitude, longitude)
+
+        Returns:
+            (row, column) of the cell, or None if the grid isn't sampled or the
+            position isn't one of its nodes
+        """
+        grid = self._search_grid
+        if grid is None:
+            return None
+
+        lat, lng = position
+        i = grid.start_index[0] + round((lat - self.start[0]) * self._inv_grid_size)
+        j = grid.start_index[1] + round((lng - self.start[1]) * self._inv_grid_size)
+        height, width = grid.terrain.difficulty.shape
+        if not (0 <= i < height and 0 <= j < width):
+            return None
+        if abs(lat - grid.lats[i]) > 1e-9 or abs(lng - grid.lngs[j]) > 1e-9:
+            return None
+        return i, j
+
     def _get_terrain_factor(self, position: Tuple[float, float]) -> float:
         """
         Get terrain difficulty factor for a position.
@@ -120,18 +613,32 @@ class MultiCriteriaAStar:
         Returns:
             Terrain difficulty factor (0.0-1.0)
         """
-        # Check if we have this in cache
-        if position in self.terrain_cache:
-            return self.terrain_cache[position]
+        cell = self._grid_cell(position)
+        if cell is not None:
+            return float(self._search_grid.terrain.difficulty[cell])
 
         # Get terrain difficulty from analyzer
-        terrain_difficulty = self.terrain_analyzer.get_terrain_difficulty(
-            position[0], position[1]
-        )
-
-        # Cache and return
-        self.terrain_cache[position] = terrain_difficulty
-        return terrain_difficulty
+        return self.terrain_analyzer.get_terrain_difficulty(position[0], position[1])
+
+    def _get_goal_terrain_factor(self) -> float:
+        """Get the terrain difficulty factor at the goal, looked up once per instance."""
+        if self._goal_terrain_factor is None:
+            self._goal_terrain_factor = self._get_terrain_factor(self.goal)
+        return self._goal_terrain_factor
+
+    def _get_accessibility(self, position: Tuple[float, float]) -> float:
+        """Get accessibility (0.0-1.0) for a position, from the search grid when sampled."""
+        cell = self._grid_cell(position)
+        if cell is not None:
+            return float(self._search_grid.terrain.accessibility[cell])
+        return self.terrain_analyzer.get_accessibility(position[0], position[1])
+
+    def _is_valid_position(self, position: Tuple[float, float]) -> bool:
+        """Check if a position is valid for routing, from the search grid when sampled."""
+        cell = self._grid_cell(position)
+        if cell is not None:
+            return bool(self._search_grid.terrain.valid[cell])
+        return self.terrain_analyzer.is_valid_position(position[0], position[1])
 
     def get_neighbors(self, position: Tuple[float, float], grid_size: Optional[float] = None) -> List[Tuple[float, float]]:
         """
@@ -142,9 +649,26 @@ class MultiCriteriaAStar:
             grid_size: Optional grid size to use. If None, use default grid size.
 
         Returns:
-            List of neighboring positions
+            List of neighboring positions. Neighbors are nodes of the sampled
+            search grid; positions that aren't grid nodes only get the goal.
+        """
+        return [neighbor for _, neighbor in self._get_neighbor_nodes(position, grid_size)]
+
+    def _get_neighbor_nodes(self, position: Tuple[float, float],
+                            grid_size: Optional[float] = None) -> List[Tuple[int, Tuple[float, float]]]:
+        """
+        Get valid neighbors with their node keys, see get_neighbors.
+
+        A grid node at cell (i, j) has the key i * width + j and the goal has
+        the key height * width, as in _astar_core.
+
+        Args:
+            position: Current position (latitude, longitude)
+            grid_size: Optional grid size to use. If None, use default grid size.
+
+        Returns:
+            List of (node key, position) pairs
         """
-        lat, lng = position
         neighbors = []
 
         # Use provided grid size or default
@@ -152,91 +676,147 @@ class MultiCriteriaAStar:
         if grid_size is not None:
             step = grid_size
 
-        # Generate neighbors in 8 directions
-        for dlat in [-step, 0, step]:
-            for dlng in [-step, 0, step]:
-                if dlat == 0 and dlng == 0:
-                    continue  # Skip current position
-
-                neighbor = (lat + dlat, lng + dlng)
-
-                # Check if the neighbor is valid (e.g., not in restricted area)
-                if self.terrain_analyzer.is_valid_position(neighbor[0], neighbor[1]):
-                    neighbors.append(neighbor)
-                else:
-                    # Log forbidden area detection
-                    logger.debug(f"Position {neighbor} is in a forbidden area")
-
-                    # Even if restricted, if we're very close to the goal, allow the position
-                    # This helps when goal is in a technically restricted area
-                    if haversine_distance(neighbor, self.goal) < step * 3:
-                        logger.debug(f"Allowing forbidden position {neighbor} because it's close to goal")
-                        neighbors.append(neighbor)
+        grid = self._get_search_grid()
+        height, width = grid.terrain.valid.shape
+        cell = self._grid_cell(position)
+        if cell is not None:
+            # Generate neighbors in 8 directions that lie on the grid
+            candidates = np.add(cell, self.NEIGHBOR_OFFSETS * round(step * self._inv_grid_size))
+            inside = ((candidates >= 0).all(axis=1) & (candidates[:, 0] < height)
+                      & (candidates[:, 1] < width))
+            rows, cols = candidates[inside].T
+            lats = grid.lats[rows]
+            lngs = grid.lngs[cols]
+
+            # Check if the neighbors are valid (e.g., not in restricted area)
+            valid = grid.terrain.valid[rows, cols]
+            if not valid.all():
+                # Even if restricted, if we're very close to the goal, allow the position
+                # This helps when goal is in a technically restricted area
+                near_goal = ~valid & (equirectangular_to_point(lats, lngs, self.goal, self._cos_lat0) < step * 3)
+
+                # Log forbidden area detection; the position lists are only built when logged
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Positions %s are in a forbidden area", list(zip(lats[~valid], lngs[~valid])))
+                    if near_goal.any():
+                        logger.debug("Allowing forbidden positions %s because they're close to goal",
+                                     list(zip(lats[near_goal], lngs[near_goal])))
+                valid |= near_goal
+
+            keys = rows[valid] * width + cols[valid]
+            neighbors = list(zip(keys.tolist(), zip(lats[valid].tolist(), lngs[valid].tolist())))
 
         # If we're getting close to the goal, add it as a direct neighbor
-        if haversine_distance(position, self.goal) < step * 4:
-            if self.goal not in neighbors:
-                neighbors.append(self.goal)
+        if self._fast_distance(position, self.goal) < step * 4:
+            if all(neighbor != self.goal for _, neighbor in neighbors):
+                neighbors.append((height * width, self.goal))
 
         return neighbors
 
     def calculate_edge_cost(self, current: Tuple[float, float], 
-                           neighbor: Tuple[float, float]) -> Dict[str, float]:
+                           neighbor: Tuple[float, float],
+                           out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Calculate the cost of moving from current to neighbor based on multiple criteria.
 
         Args:
             current: Current position (latitude, longitude)
             neighbor: Neighbor position (latitude, longitude)
+            out: Optional array of length len(CRITERIA) to write the costs into
 
         Returns:
-            Dictionary of costs for each criterion
+            Array of costs for each criterion, in CRITERIA order (out if given)
         """
         # Calculate base distance cost
-        distance = haversine_distance(current, neighbor)
-
-        # Get terrain difficulty for the neighbor
-        terrain_difficulty = self._get_terrain_factor(neighbor)
-
-        # Calculate environmental impact
-        environmental_impact = calculate_environmental_impact(
-            self.pipe_type, self.pipe_diameter, terrain_difficulty)
-
-        # Calculate construction cost
-        construction_cost = calculate_construction_cost(
-            distance, self.pipe_diameter, self.pipe_material, 
-            terrain_difficulty, self.pipe_type)
+        distance = self._fast_distance(current, neighbor)
+
+        # Terrain, environmental impact and construction cost per km of the
+        # search grid cells and the goal are computed once in _get_search_grid
+        grid = self._search_grid
+        cell = self._grid_cell(neighbor)
+        if cell is not None:
+            terrain_difficulty = grid.terrain.difficulty[cell]
+            accessibility = grid.terrain.accessibility[cell]
+            environmental_impact = grid.environmental_impact[cell]
+            construction_cost = grid.construction_cost_per_km[cell] * distance
+        elif grid is not None and neighbor == self.goal:
+            terrain_difficulty, accessibility, environmental_impact, cost_per_km = grid.goal_values.tolist()
+            construction_cost = cost_per_km * distance
+        else:
+            # Get terrain difficulty for the neighbor
+            if neighbor == self.goal:
+                terrain_difficulty = self._get_goal_terrain_factor()
+            else:
+                terrain_difficulty = self._get_terrain_factor(neighbor)
+
+            # Calculate environmental impact and construction cost
+            costs = calculate_all_costs(distance, self.pipe_diameter, self._material_code,
+                                        terrain_difficulty, self._pipe_type_code)
+            environmental_impact = costs.environmental
+            construction_cost = costs.construction
+
+            accessibility = self._get_accessibility(neighbor)
 
         # Calculate maintenance access difficulty (inverse of accessibility)
-        accessibility = self.terrain_analyzer.get_accessibility(neighbor[0], neighbor[1])
         maintenance_access = 1.0 - accessibility  # Invert for cost (higher is worse)
 
         # Return multi-criteria costs
-        return {
-            'distance': distance,
-            'terrain_difficulty': distance * (1 + terrain_difficulty),
-            'environmental_impact': environmental_impact,
-            'construction_cost': construction_cost,
-            'maintenance_access': distance * (1 + maintenance_access)
-        }
+        if out is None:
+            out = np.empty(len(CRITERIA))
+        out[DISTANCE] = distance
+        out[TERRAIN_DIFFICULTY] = distance * (1 + terrain_difficulty)
+        out[ENVIRONMENTAL_IMPACT] = environmental_impact
+        out[CONSTRUCTION_COST] = construction_cost
+        out[MAINTENANCE_ACCESS] = distance * (1 + maintenance_access)
+        return out
+
+    def _segment_costs(self, starts: List[Tuple[float, float]],
+                       goals: List[Tuple[float, float]]) -> np.ndarray:
+        """
+        Calculate the costs of many segments at once, as calculate_edge_cost does for one.
 
-    def combine_costs(self, costs: Dict[str, float]) -> float:
+        Args:
+            starts: Start positions of the segments
+            goals: End positions of the segments
+
+        Returns:
+            Array of shape (number of segments, len(CRITERIA)) with the costs in CRITERIA order
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        goals = np.asarray(goals, dtype=float).reshape(-1, 2)
+        distance = equirectangular_to_point(starts[:, 0], starts[:, 1], (goals[:, 0], goals[:, 1]),
+                                            self._cos_lat0)
+
+        # Terrain difficulty and accessibility at the segment ends
+        goal_points = list(map(tuple, goals.tolist()))
+        terrain_difficulty = np.array([
+            self._get_goal_terrain_factor() if point == self.goal else self._get_terrain_factor(point)
+            for point in goal_points
+        ])
+        accessibility = np.array([self._get_accessibility(point) for point in goal_points])
+
+        scores = score_segments(SegmentBatch(distance, self.pipe_diameter, self._material_code,
+                                             terrain_difficulty, self._pipe_type_code))
+
+        costs = np.empty((len(goal_points), len(CRITERIA)))
+        costs[:, DISTANCE] = distance
+        costs[:, TERRAIN_DIFFICULTY] = distance * (1 + terrain_difficulty)
+        costs[:, ENVIRONMENTAL_IMPACT] = scores[:, 1]
+        costs[:, CONSTRUCTION_COST] = scores[:, 0]
+        costs[:, MAINTENANCE_ACCESS] = distance * (1 + (1.0 - accessibility))
+        return costs
+
+    def combine_costs(self, costs: np.ndarray) -> float:
         """
         Combine multiple cost criteria into a single value using weights.
 
         Args:
-            costs: Dictionary of costs for each criterion
+            costs: Array of costs for each criterion, in CRITERIA order
 
         Returns:
             Combined weighted cost
         """
-        combined_cost = 0.0
-
-        for criterion, weight in self.criteria_weights.items():
-            if criterion in costs:
-                combined_cost += costs[criterion] * weight
-
-        return combined_cost
+        return self._combine(costs)
 
     def find_paths(self, num_alternatives: int = 2) -> List[Tuple[List[Tuple[float, float]], Dict[str, Any]]]:
         """
@@ -250,19 +830,32 @@ class MultiCriteriaAStar:
         """
         paths = []
 
-        # Find main optimal path
-        main_path, main_metrics = self._find_single_path()
+        # Alternative searches run on copies of this instance with adjusted
+        # weights, each derived from the previous ones. The copies share the
+        # sampled search grid, so it is built first when the routes use it.
+        if self._uses_search_grid():
+            self._get_search_grid()
+        searches = []
+        for i in range(num_alternatives):
+            previous = searches[-1] if searches else self
+            searches.append(previous._with_criteria_weights(previous._get_alternative_weights(i + 1)))
+
+        if HAVE_NUMBA and searches and self._uses_search_grid():
+            # The compiled grid searches release the GIL, so the alternatives
+            # run in threads alongside the main search
+            with ThreadPoolExecutor(max_workers=len(searches)) as executor:
+                alt_results = executor.map(MultiCriteriaAStar._find_single_path, searches)
+                main_path, main_metrics = self._find_single_path()
+                alt_results = list(alt_results)
+        else:
+            # Find main optimal path, then the alternatives if it was found
+            main_path, main_metrics = self._find_single_path()
+            alt_results = map(MultiCriteriaAStar._find_single_path, searches)
+
         if main_path:
             paths.append((main_path, main_metrics))
 
-            # Generate alternative paths by adjusting weights
-            for i in range(num_alternatives):
-                # Adjust weights for alternatives
-                alt_weights = self._get_alternative_weights(i + 1)
-                self.criteria_weights = alt_weights
-
-                # Find alternative path
-                alt_path, alt_metrics = self._find_single_path()
+            for i, (alt_path, alt_metrics) in enumerate(alt_results):
                 if alt_path:
                     # Add alternative number to metrics
                     alt_metrics['alternative_num'] = i + 1
@@ -270,6 +863,16 @@ class MultiCriteriaAStar:
 
         return paths
 
+    def _with_criteria_weights(self, criteria_weights: Dict[str, float]) -> 'MultiCriteriaAStar':
+        """Get a copy of this search that uses other criteria weights and shares the sampled terrain."""
+        search = copy.copy(self)
+        search._set_criteria_weights(criteria_weights)
+        return search
+
+    def _uses_search_grid(self) -> bool:
+        """Check if _find_single_path searches the sampled grid, which it does for 0.5-2 km routes."""
+        return 0.5 <= haversine_distance(self.start, self.goal) <= 2.0
+
     def _find_single_path(self) -> Tuple[List[Tuple[float, float]], Dict[str, Any]]:
         """
         Find a single optimal path using current weights.
@@ -283,45 +886,41 @@ class MultiCriteriaAStar:
         if direct_distance < 0.5:  # If closer than 500m, use direct path
             logger.info(f"Start and goal are very close ({direct_distance:.3f} km), providing direct path")
             # Create a simple path with start and goal
-            start_node = Node(self.start, {'distance': 0.0, 'terrain_difficulty': 0.0, 
-                                          'environmental_impact': 0.0, 'construction_cost': 0.0, 
-                                          'maintenance_access': 0.0})
-            goal_node = Node(self.goal, {
-                'distance': direct_distance,
-                'terrain_difficulty': direct_distance * (1 + self._get_terrain_factor(self.goal)),
-                'environmental_impact': calculate_environmental_impact(
-                    self.pipe_type, self.pipe_diameter, self._get_terrain_factor(self.goal)),
-                'construction_cost': calculate_construction_cost(
-                    direct_distance, self.pipe_diameter, self.pipe_material, 
-                    self._get_terrain_factor(self.goal), self.pipe_type),
-                'maintenance_access': direct_distance * (1 + (1.0 - self.terrain_analyzer.get_accessibility(
-                    self.goal[0], self.goal[1])))
-            }, start_node)
+            start_node = Node(self.start, np.zeros(len(CRITERIA)))
+            goal_node = Node(self.goal, self.calculate_edge_cost(self.start, self.goal), start_node)
             return self._reconstruct_path(goal_node)
         elif direct_distance > 2.0:  # For distances over 2km, use adaptive approach
             logger.info(f"Long distance path ({direct_distance:.3f} km), using adaptive approach")
             return self._find_path_adaptive()
 
-        # Initialize open and closed sets
+        if direct_distance > self.bidirectional_threshold:
+            logger.info(f"Path of {direct_distance:.3f} km, searching from both ends")
+            return self._find_path_bidirectional()
+        if HAVE_NUMBA:
+            return self._find_path_compiled()
+
+        # Sample terrain around the start and goal so that lookups are array reads
+        grid = self._get_search_grid()
+
+        # Initialize open and closed sets. Nodes are identified by their
+        # integer keys, see _get_neighbor_nodes. The open set holds (f_score,
+        # counter, key) entries; an improved node is pushed again and its
+        # outdated entries are skipped when popped. The counter breaks
+        # f_score ties.
         open_set = []
-        closed_set: Set[Tuple[float, float]] = set()
+        closed_set: Set[int] = set()
+        counter = itertools.count()
 
         # Create start node with initial g_scores
-        initial_g_scores = {
-            'distance': 0.0,
-            'terrain_difficulty': 0.0,
-            'environmental_impact': 0.0,
-            'construction_cost': 0.0,
-            'maintenance_access': 0.0
-        }
-        start_node = Node(self.start, initial_g_scores)
+        start_node = Node(self.start, np.zeros(len(CRITERIA)))
 
         # Calculate initial f_score and add to open set
         start_node.f_score = self.calculate_h_score(self.start)
-        heapq.heappush(open_set, start_node)
+        start_key = grid.start_index[0] * grid.terrain.valid.shape[1] + grid.start_index[1]
+        heapq.heappush(open_set, (start_node.f_score, next(counter), start_key))
 
-        # Keep track of nodes by position for faster lookup
-        node_dict = {self.start: start_node}
+        # Keep track of nodes by key for faster lookup
+        node_dict: Dict[int, Node] = {start_key: start_node}
 
         # Start A* algorithm
         iterations = 0
@@ -329,82 +928,176 @@ class MultiCriteriaAStar:
         # Dynamically adjust grid size if needed - start with smaller grid
         current_grid_size = self.grid_size
 
+        # Weighted cost function of this search, see combine_costs
+        combine = self._combine
+
+        # Scratch buffers for the edge costs and candidate g-scores of a neighbor
+        edge_costs = np.empty(len(CRITERIA))
+        new_g_scores = np.empty(len(CRITERIA))
+
         while open_set and iterations < self.max_iterations:
+            # Get node with lowest f_score, skipping outdated entries
+            f_score, _, current_key = heapq.heappop(open_set)
+            current_node = node_dict[current_key]
+            if f_score > current_node.f_score or current_key in closed_set:
+                continue
+            current_pos = current_node.position
+
             iterations += 1
 
             # Periodically log progress
             if iterations % 1000 == 0:
-                logger.debug(f"Path finding iteration {iterations}, open set size: {len(open_set)}")
+                logger.debug("Path finding iteration %d, open set size: %d", iterations, len(open_set))
 
                 # If we've been searching for a long time, try increasing grid size
                 if iterations > 5000 and current_grid_size == self.grid_size:
                     logger.info(f"Increasing grid size for faster search at iteration {iterations}")
                     current_grid_size = self.grid_size * 2
 
-            # Get node with lowest f_score
-            current_node = heapq.heappop(open_set)
-            current_pos = current_node.position
-
             # Check if we reached the goal or are close enough
-            dist_to_goal = haversine_distance(current_pos, self.goal)
+            dist_to_goal = self._fast_distance(current_pos, self.goal)
             if dist_to_goal < current_grid_size * 2:
                 logger.info(f"Path found after {iterations} iterations (distance to goal: {dist_to_goal:.6f})")
 
                 # Create final node at exact goal position
-                final_edge_costs = self.calculate_edge_cost(current_pos, self.goal)
-                final_g_scores = {}
-
-                for criterion, cost in current_node.g_score.items():
-                    final_g_scores[criterion] = cost + final_edge_costs[criterion]
-
+                final_g_scores = current_node.g_score + self.calculate_edge_cost(current_pos, self.goal)
                 goal_node = Node(self.goal, final_g_scores, current_node)
                 return self._reconstruct_path(goal_node)
 
             # Add to closed set
-            closed_set.add(current_pos)
+            closed_set.add(current_key)
 
             # Explore neighbors
-            for neighbor_pos in self.get_neighbors(current_pos, current_grid_size):
+            for neighbor_key, neighbor_pos in self._get_neighbor_nodes(current_pos, current_grid_size):
                 # Skip if neighbor is already processed
-                if neighbor_pos in closed_set:
+                if neighbor_key in closed_set:
                     continue
 
                 # Calculate new g_scores for this neighbor
-                edge_costs = self.calculate_edge_cost(current_pos, neighbor_pos)
-                new_g_scores = {}
-
-                for criterion, cost in current_node.g_score.items():
-                    new_g_scores[criterion] = cost + edge_costs[criterion]
+                self.calculate_edge_cost(current_pos, neighbor_pos, edge_costs)
+                np.add(current_node.g_score, edge_costs, out=new_g_scores)
 
                 # Create or update neighbor node
-                if neighbor_pos not in node_dict:
-                    neighbor_node = Node(neighbor_pos, new_g_scores, current_node)
-                    combined_g = self.combine_costs(new_g_scores)
+                if neighbor_key not in node_dict:
+                    neighbor_node = Node(neighbor_pos, new_g_scores.copy(), current_node)
+                    combined_g = combine(new_g_scores)
                     h_score = self.calculate_h_score(neighbor_pos)
                     neighbor_node.f_score = combined_g + h_score
 
-                    heapq.heappush(open_set, neighbor_node)
-                    node_dict[neighbor_pos] = neighbor_node
+                    heapq.heappush(open_set, (neighbor_node.f_score, next(counter), neighbor_key))
+                    node_dict[neighbor_key] = neighbor_node
                 else:
-                    neighbor_node = node_dict[neighbor_pos]
+                    neighbor_node = node_dict[neighbor_key]
 
                     # Check if this path is better based on combined cost
-                    old_combined_g = self.combine_costs(neighbor_node.g_score)
-                    new_combined_g = self.combine_costs(new_g_scores)
+                    old_combined_g = combine(neighbor_node.g_score)
+                    new_combined_g = combine(new_g_scores)
 
                     if new_combined_g < old_combined_g:
                         # Update the node with better path
-                        neighbor_node.g_score = new_g_scores
+                        neighbor_node.g_score = new_g_scores.copy()
                         neighbor_node.parent = current_node
                         neighbor_node.f_score = new_combined_g + self.calculate_h_score(neighbor_pos)
 
-                        # Re-add to open set (will be properly sorted by heap)
-                        if neighbor_node not in open_set:
-                            heapq.heappush(open_set, neighbor_node)
+                        # Re-add to open set with the new f_score
+                        heapq.heappush(open_set, (neighbor_node.f_score, next(counter), neighbor_key))
 
         logger.warning(f"No path found after {iterations} iterations")
         return [], {"error": "Путь не найден. Возможно, требуется изменить параметры поиска."}
 
+    def _get_search_grid(self) -> SearchGrid:
+        """
+        Sample terrain and per-cell costs on the search grid around the start and goal.
+
+        The grid is aligned with the start point and sampled once per instance,
+        so the alternative searches reuse it.
+        """
+        if self._search_grid is not None:
+            return self._search_grid
+
+        step = self.grid_size
+        span_lat = int(round(abs(self.goal[0] - self.start[0]) / step))
+        span_lng = int(round(abs(self.goal[1] - self.start[1]) / step))
+        padding = max(span_lat, span_lng) // 2 + self.search_grid_padding
+
+        # Cell offsets of the start in the grid; the goal is on the other side of the box
+        start_i = padding + (span_lat if self.goal[0] < self.start[0] else 0)
+        start_j = padding + (span_lng if self.goal[1] < self.start[1] else 0)
+        lats = self.start[0] + (np.arange(span_lat + 2 * padding + 1) - start_i) * step
+        lngs = self.start[1] + (np.arange(span_lng + 2 * padding + 1) - start_j) * step
+
+        terrain = self.terrain_analyzer.sample_grid(lats, lngs)
+        environmental_impact = calculate_environmental_impact_batch(
+            self._pipe_type_code, self.pipe_diameter, terrain.difficulty)
+        construction_cost_per_km = calculate_construction_cost_batch(
+            1.0, self.pipe_diameter, self._material_code, terrain.difficulty, self._pipe_type_code)
+
+        goal_difficulty = self._get_goal_terrain_factor()
+        goal_costs = calculate_all_costs(1.0, self.pipe_diameter, self._material_code,
+                                         goal_difficulty, self._pipe_type_code)
+        goal_values = np.array([
+            goal_difficulty,
+            self.terrain_analyzer.get_accessibility(self.goal[0], self.goal[1]),
+            goal_costs.environmental,
+            goal_costs.construction
+        ])
+
+        self._search_grid = SearchGrid(lats, lngs, (start_i, start_j), terrain,
+                                       environmental_impact, construction_cost_per_km, goal_values)
+        return self._search_grid
+
+    def _find_path_compiled(self) -> Tuple[List[Tuple[float, float]], Dict[str, Any]]:
+        """
+        Find a single optimal path with the compiled grid search.
+
+        Used instead of the search loop in _find_single_path when Numba is
+        available. The search is confined to the sampled grid.
+        """
+        return self._run_grid_search(_astar_core)
+
+    def _find_path_bidirectional(self) -> Tuple[List[Tuple[float, float]], Dict[str, Any]]:
+        """
+        Find a single optimal path searching from the start and the goal at once.
+
+        The two searches meet halfway, so they expand fewer cells than one
+        search from the start. Runs compiled when Numba is available and
+        is confined to the sampled grid.
+        """
+        return self._run_grid_search(_bidirectional_core)
+
+    def _run_grid_search(self, core) -> Tuple[List[Tuple[float, float]], Dict[str, Any]]:
+        """
+        Run a grid search kernel on the sampled search grid.
+
+        Args:
+            core: _astar_core or _bidirectional_core
+
+        Returns:
+            Tuple of (path coordinates, metrics dictionary)
+        """
+        grid = self._get_search_grid()
+        path_nodes, g_score, iterations = core(
+            grid.lats, grid.lngs, grid.terrain.difficulty, grid.terrain.accessibility,
+            grid.terrain.valid, grid.environmental_impact, grid.construction_cost_per_km,
+            grid.start_index[0], grid.start_index[1], self.goal[0], self.goal[1],
+            grid.goal_values, self._weights, self.grid_size, self.max_iterations
+        )
+
+        if len(path_nodes) == 0:
+            logger.warning(f"No path found after {iterations} iterations")
+            return [], {"error": "Путь не найден. Возможно, требуется изменить параметры поиска."}
+
+        logger.info(f"Path found after {iterations} iterations")
+        lats = grid.lats.tolist()
+        lngs = grid.lngs.tolist()
+        width = len(lngs)
+        goal_node = len(lats) * width
+        path = [self.goal if k == goal_node else (lats[k // width], lngs[k % width])
+                for k in path_nodes.tolist()]
+        path.append(self.goal)
+
+        return path, self._path_metrics(path, g_score)
+
     def _find_path_adaptive(self) -> Tuple[List[Tuple[float, float]], Dict[str, Any]]:
         """
         Find path for long distances using an adaptive approach that considers terrain features.
@@ -441,16 +1134,9 @@ class MultiCriteriaAStar:
         # Process each segment and build complete path
         full_path = [self.start]  # Start with the first point
 
-        # Initialize metrics
-        total_metrics = {
-            "distance": 0.0,
-            "terrain_difficulty": 0.0,
-            "environmental_impact": 0.0,
-            "construction_cost": 0.0,
-            "maintenance_access": 0.0
-        }
-
-        # Process each segment between optimized waypoints
+        # Collect the segments between optimized waypoints
+        segment_starts = []
+        segment_goals = []
         for i in range(1, len(optimized_waypoints)):
             segment_start = optimized_waypoints[i-1]
             segment_goal = optimized_waypoints[i]
@@ -459,19 +1145,17 @@ class MultiCriteriaAStar:
             if segment_start == segment_goal:
                 continue
 
-            logger.debug(f"Processing segment {i} from {segment_start} to {segment_goal}")
-
-            # Calculate cost for this segment
-            edge_costs = self.calculate_edge_cost(segment_start, segment_goal)
-
-            # Add to metrics
-            for key in total_metrics:
-                total_metrics[key] += edge_costs[key]
+            logger.debug("Processing segment %d from %s to %s", i, segment_start, segment_goal)
+            segment_starts.append(segment_start)
+            segment_goals.append(segment_goal)
 
             # Add waypoint to path (skip if same as last point)
             if segment_goal != full_path[-1]:
                 full_path.append(segment_goal)
 
+        # Calculate the costs of all segments at once
+        total_metrics = self._segment_costs(segment_starts, segment_goals).sum(axis=0)
+
         # Calculate total distance of the final path
         total_distance = calculate_distance(full_path)
 
@@ -492,9 +1176,9 @@ class MultiCriteriaAStar:
         # Final metrics
         metrics = {
             "total_distance": total_distance,
-            "estimated_cost": total_metrics["construction_cost"],
-            "terrain_difficulty_score": total_metrics["terrain_difficulty"] / total_distance if total_distance > 0 else 0,
-            "environmental_impact_score": total_metrics["environmental_impact"],
+            "estimated_cost": float(total_metrics[CONSTRUCTION_COST]),
+            "terrain_difficulty_score": float(total_metrics[TERRAIN_DIFFICULTY]) / total_distance if total_distance > 0 else 0,
+            "environmental_impact_score": float(total_metrics[ENVIRONMENTAL_IMPACT]),
             "estimated_construction_time": round(construction_time, 1)
         }
 
@@ -512,33 +1196,21 @@ class MultiCriteriaAStar:
         """
         optimized = [waypoints[0]]  # Always keep the start point
 
-        for i in range(1, len(waypoints) - 1):
-            current = waypoints[i]
-
-            # Sample points around the current waypoint to find better alternatives
-            alternatives = []
-
-            # The current waypoint is always an alternative
-            alternatives.append((current, self._evaluate_point_suitability(current)))
+        if len(waypoints) > 2:
+            # Sample points around each inner waypoint to find better alternatives;
+            # the current waypoint is always the first alternative
+            inner = np.asarray(waypoints[1:-1], dtype=float)
+            candidates = np.concatenate(
+                (inner[:, None, :], inner[:, None, :] + self.WAYPOINT_SAMPLE_OFFSETS), axis=1)
+            scores = self._evaluate_points_suitability_batch(candidates)
 
-            # Try points in different directions from the current point
-            sample_radius = 0.002  # About 200m
-            for angle in range(0, 360, 45):  # 8 directions
-                rad_angle = math.radians(angle)
-                alt_lat = current[0] + sample_radius * math.sin(rad_angle)
-                alt_lng = current[1] + sample_radius * math.cos(rad_angle)
-                alt_point = (alt_lat, alt_lng)
+            # Choose the best alternative of each waypoint
+            best_points = candidates[np.arange(len(inner)), scores.argmax(axis=1)]
 
-                # Evaluate this alternative
-                suitability = self._evaluate_point_suitability(alt_point)
-                alternatives.append((alt_point, suitability))
-
-            # Choose the best alternative
-            best_point, _ = max(alternatives, key=lambda x: x[1])
-
-            # Only add if it's different from the last added point
-            if best_point != optimized[-1]:
-                optimized.append(best_point)
+            for best_point in map(tuple, best_points.tolist()):
+                # Only add if it's different from the last added point
+                if best_point != optimized[-1]:
+                    optimized.append(best_point)
 
         # Always keep the end point
         if waypoints[-1] != optimized[-1]:
@@ -546,6 +1218,21 @@ class MultiCriteriaAStar:
 
         return optimized
 
+    def _evaluate_points_suitability_batch(self, points: np.ndarray) -> np.ndarray:
+        """
+        Evaluate the suitability of many points, see _evaluate_point_suitability.
+
+        Args:
+            points: Array of (lat, lng) pairs of shape (..., 2)
+
+        Returns:
+            Array of suitability scores of shape points.shape[:-1]
+        """
+        flat = points.reshape(-1, 2).tolist()
+        scores = np.fromiter((self._evaluate_point_suitability(point) for point in flat),
+                             dtype=float, count=len(flat))
+        return scores.reshape(points.shape[:-1])
+
     def _evaluate_point_suitability(self, point: Tuple[float, float]) -> float:
         """
         Evaluate how suitable a point is for the pipeline path based on terrain features.
@@ -562,14 +1249,11 @@ class MultiCriteriaAStar:
 
         # Check if this is a valid position at all
         if not self.terrain_analyzer.is_valid_position(lat, lng):
-            logger.debug(f"Invalid position during suitability evaluation: {point}")
+            logger.debug("Invalid position during suitability evaluation: %s", point)
             return 0.01  # Very low score for forbidden areas
 
         # Apply criteria weights for evaluation
-        road_weight = self.criteria_weights.get('maintenance_access', 0.15) * 3.0
-        water_weight = self.criteria_weights.get('terrain_difficulty', 0.2) * 3.0
-        env_weight = self.criteria_weights.get('environmental_impact', 0.15) * 3.0
-        cost_weight = self.criteria_weights.get('construction_cost', 0.2) * 3.0
+        road_weight, water_weight, env_weight, cost_weight = self._suitability_weights
 
         # Check for proximity to roads (bonus for being near roads)
         is_near_road, road_bonus = self.terrain_analyzer.near_road(lat, lng)
@@ -597,7 +1281,7 @@ class MultiCriteriaAStar:
 
         # Log very low scores for debugging
         if base_score < 0.2:
-            logger.debug(f"Very low suitability score {base_score:.3f} at {point}")
+            logger.debug("Very low suitability score %.3f at %s", base_score, point)
 
         # Ensure score is in valid range
         return max(0.01, min(base_score, 1.0))
@@ -634,55 +1318,40 @@ class MultiCriteriaAStar:
         if len(path) <= 3:
             return path
 
-        smoothed = [path[0]]  # Always keep start
+        pts = np.asarray(path, dtype=float)
+        inner = pts[1:-1]
+
+        # Calculate angles to detect turns
+        steps = np.diff(pts, axis=0)
+        angles = np.arctan2(steps[:, 0], steps[:, 1])
+        angle_diff = np.abs(np.diff(angles))
+
+        # Check terrain features at the inner points
+        features = self.terrain_analyzer.query_batch(inner[:, 0], inner[:, 1])
+
+        # Keep point if:
+        # 1. It's a significant turn OR
+        # 2. It's a water crossing point OR
+        # 3. It's a road access point OR
+        # 4. It's a point with significant terrain difficulty OR
+        # 5. It's far from neighboring points
+        keep = ((angle_diff > 0.2) |  # Significant turn
+                features.water_mask |  # Water crossing
+                features.road_mask |  # Road access
+                (features.difficulty > 0.6) |  # Difficult terrain
+                (np.diff(cumulative_distance(pts))[:-1] > 0.8))  # Distance threshold
 
-        for i in range(1, len(path) - 1):
-            prev = path[i-1]
-            curr = path[i]
-            next_pt = path[i+1]
-
-            # Calculate angles to detect turns
-            angle1 = math.atan2(curr[0] - prev[0], curr[1] - prev[1])
-            angle2 = math.atan2(next_pt[0] - curr[0], next_pt[1] - curr[1])
-            angle_diff = abs(angle1 - angle2)
-
-            # Check terrain features at this point
-            lat, lng = curr
-            is_water, _ = self.terrain_analyzer.is_water_crossing(lat, lng)
-            is_near_road, _ = self.terrain_analyzer.near_road(lat, lng)
-            terrain_difficulty = self.terrain_analyzer.get_terrain_difficulty(lat, lng)
-
-            # Keep point if:
-            # 1. It's a significant turn OR
-            # 2. It's a water crossing point OR
-            # 3. It's a road access point OR
-            # 4. It's a point with significant terrain difficulty OR
-            # 5. It's far from neighboring points
-            if (angle_diff > 0.2 or  # Significant turn
-                is_water or  # Water crossing
-                is_near_road or  # Road access
-                terrain_difficulty > 0.6 or  # Difficult terrain
-                haversine_distance(prev, curr) > 0.8):  # Distance threshold
-
-                # Only add if not too close to the last added point
-                if haversine_distance(smoothed[-1], curr) > 0.05:  # 50m minimum spacing
-                    smoothed.append(curr)
+        smoothed = [path[0]]  # Always keep start
+        for curr in inner[keep].tolist():
+            curr = tuple(curr)
+            # Only add if not too close to the last added point
+            if haversine_distance(smoothed[-1], curr) > 0.05:  # 50m minimum spacing
+                smoothed.append(curr)
 
         smoothed.append(path[-1])  # Always keep goal
 
         return smoothed
 
-    # Пример метода, возвращающего метрики
-    def calculate_metrics(full_path, total_metrics, total_distance, construction_time):
-        metrics = {
-            "total_distance": total_distance,
-            "estimated_cost": total_metrics["construction_cost"],
-            "terrain_difficulty_score": total_metrics["terrain_difficulty"] / total_distance if total_distance > 0 else 0,
-            "environmental_impact_score": total_metrics["environmental_impact"],
-            "estimated_construction_time": round(construction_time, 1) if construction_time else 0  # Значение по умолчанию
-        }
-        return metrics
-    
     def _reconstruct_path(self, end_node: Node) -> Tuple[List[Tuple[float, float]], Dict[str, Any]]:
         """
         Reconstruct the path from the goal node back to the start.
@@ -703,15 +1372,27 @@ class MultiCriteriaAStar:
         # Reverse to get path from start to goal
         path.reverse()
 
-        # Calculate metrics for the final path
+        return path, self._path_metrics(path, end_node.g_score)
+
+    def _path_metrics(self, path: List[Tuple[float, float]], g_score: np.ndarray) -> Dict[str, Any]:
+        """
+        Calculate the metrics of a found path.
+
+        Args:
+            path: Path coordinates from start to goal
+            g_score: Accumulated costs at the goal, in CRITERIA order
+
+        Returns:
+            Metrics dictionary
+        """
         total_distance = calculate_distance(path)
-        construction_cost = end_node.g_score.get('construction_cost', 0)
-        terrain_difficulty = end_node.g_score.get('terrain_difficulty', 0)
-        environmental_impact = end_node.g_score.get('environmental_impact', 0)
+        construction_cost = float(g_score[CONSTRUCTION_COST])
+        terrain_difficulty = float(g_score[TERRAIN_DIFFICULTY])
+        environmental_impact = float(g_score[ENVIRONMENTAL_IMPACT])
 
         try:
             # Estimate construction time (days) based on distance and terrain
-            construction_time = (total_distance / 1000) * (1 + self._get_terrain_factor(self.goal) * 0.5)
+            construction_time = (total_distance / 1000) * (1 + self._get_goal_terrain_factor() * 0.5)
         except (ZeroDivisionError, KeyError):
             construction_time = 0  # Значение по умолчанию при ошибке
 
@@ -723,4 +1404,10 @@ class MultiCriteriaAStar:
             "estimated_construction_time": round(construction_time, 1) if construction_time else 0
         }
 
-        return path, metrics
\ No newline at end of file
+        return metrics
+
+# Compile the search kernels at import time so the first request isn't penalized
+if HAVE_NUMBA:
+    for _core in (_astar_core, _bidirectional_core):
+        _core(np.zeros(1), np.zeros(1), np.zeros((1, 1)), np.ones((1, 1)), np.ones((1, 1), dtype=bool),
+              np.zeros((1, 1)), np.zeros((1, 1)), 0, 0, 0.0, 0.0, np.zeros(4), np.zeros(len(CRITERIA)), 0.0005, 1)
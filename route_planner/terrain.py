@@ -7,24 +7,486 @@ and other geographical features.
 """
 
 import logging
-import random
 import math
-from typing import Dict, Tuple, Optional, Any, List
+from typing import Dict, Tuple, Optional, Any, List, NamedTuple
+
+import numpy as np
+
+from route_planner._jit import HAVE_NUMBA, njit, prange
 
 logger = logging.getLogger(__name__)
 
+# Number of points in each generation of the terrain cache, which is keyed by
+# (latitude * 1e5, longitude * 1e5) rounded half up to integers
+_TERRAIN_CACHE_SIZE = 1 << 18
+
+# Soil types, indexed by the values of get_soil_index
+_SOIL_TYPES = ('clay', 'loam', 'sand', 'rock', 'peat')
+
+# Soil difficulty factors
+_SOIL_FACTORS = {
+    'clay': 0.4,
+    'loam': 0.2,
+    'sand': 0.3,
+    'rock': 0.8,
+    'peat': 0.6
+}
+
+# Soil difficulty factors indexed like _SOIL_TYPES
+_SOIL_FACTOR_TABLE = tuple(_SOIL_FACTORS[soil_type] for soil_type in _SOIL_TYPES)
+
+# Offset in degrees (~100m) of the elevation samples used for slopes, see get_slope
+_SLOPE_STEP = 0.001
+
+# Major cities to avoid: center coordinates, squared radius and squared
+# warning margin (1.2 radii) in degrees, name; see is_valid_position
+_RESTRICTED_CITIES = tuple((lat, lng, radius * radius, (radius * 1.2)**2, name) for lat, lng, radius, name in (
+    (52.3, 104.3, 0.12, "Иркутск"),
+    (52.5, 103.9, 0.08, "Ангарск"),
+    (52.2, 104.08, 0.04, "Шелехов"),
+    (52.75, 103.65, 0.05, "Усолье-Сибирское"),
+))
+
+# Protected natural areas to avoid: center coordinates, squared radius in degrees, name
+_RESTRICTED_AREAS = tuple((lat, lng, radius * radius, name) for lat, lng, radius, name in (
+    (53.2, 107.35, 0.35, "Прибайкальский национальный парк"),
+    (53.9, 108.0, 0.40, "Байкало-Ленский заповедник"),
+    (51.5, 105.0, 0.30, "Байкальский заповедник"),
+))
+
+# Area (south, north, west, east) and spacing in degrees of the elevation lookup
+# table of the compiled batch kernel; the spacing keeps the table around 18 MB,
+# with interpolation errors of up to about 12 centimeters
+_ELEVATION_LUT_BOUNDS = (51.5, 54.0, 103.0, 108.5)
+_ELEVATION_LUT_RESOLUTION = 0.0025
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _elevation_kernel(lat: float, lng: float) -> float:
+    """Elevation in meters, see TerrainAnalyzer.get_elevation."""
+    # Base elevation for Irkutsk region (around 500m)
+    base_elevation = 500
+    
+    # Add some variation based on coordinates
+    # This creates a realistic terrain pattern
+    x_factor = math.sin(lat * 10) * math.cos(lng * 8) * 200
+    y_factor = math.sin(lng * 12) * math.cos(lat * 9) * 150
+    
+    # Small hills; a deterministic term, so slopes are stable between runs
+    hill_factor = math.sin(lat * 37) * math.cos(lng * 41) * 30
+    return base_elevation + x_factor + y_factor + hill_factor
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _elevation_lut_kernel(lat: float, lng: float, lut: np.ndarray, lat0: float, lng0: float,
+                          res: float) -> float:
+    """
+    Elevation in meters interpolated from a lookup table.
+    
+    Points outside the table fall back to _elevation_kernel.
+    
+    Args:
+        lat, lng: Point coordinates
+        lut: Elevations on a grid indexed by [lat_index, lng_index]
+        lat0, lng0: Coordinates of lut[0, 0]
+        res: Grid spacing in degrees
+    """
+    fi = (lat - lat0) / res
+    fj = (lng - lng0) / res
+    i = math.floor(fi)
+    j = math.floor(fj)
+    if i < 0 or j < 0 or i >= lut.shape[0] - 1 or j >= lut.shape[1] - 1:
+        return _elevation_kernel(lat, lng)
+    
+    # Bilinear blend of the four surrounding samples
+    di = fi - i
+    dj = fj - j
+    south = lut[i, j] + (lut[i, j + 1] - lut[i, j]) * dj
+    north = lut[i + 1, j] + (lut[i + 1, j + 1] - lut[i + 1, j]) * dj
+    return south + (north - south) * di
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _slope_kernel(elev_center: float, elev_north: float, elev_east: float) -> float:
+    """Slope from the elevations at a point and ~100m north and east of it, see TerrainAnalyzer.get_slope."""
+    # Convert to a 0.0-1.0 scale where 1.0 is extremely steep (approx 45 degrees or more)
+    slope_north = min(abs(elev_north - elev_center) / 100, 1.0)
+    slope_east = min(abs(elev_east - elev_center) / 100, 1.0)
+    
+    # Use the max slope direction
+    return max(slope_north, slope_east)
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _soil_index_kernel(lat: float, lng: float) -> int:
+    """Index of the soil type in _SOIL_TYPES, see TerrainAnalyzer.get_soil_index."""
+    # Generate a value between 0 and 1 based on coordinates
+    value = ((math.sin(lat * 100) + 1) / 2 + (math.cos(lng * 100) + 1) / 2) / 2
+    return min(int(value * len(_SOIL_TYPES)), len(_SOIL_TYPES) - 1)
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _difficulty_kernel(slope: float, soil_factor: float, water_difficulty: float,
+                       protection_factor: float, settlement_restriction: float) -> float:
+    """
+    Terrain difficulty from its components, see TerrainAnalyzer.get_terrain_difficulty.
+    
+    The water, protection and settlement factors are 0.0 outside those areas.
+    """
+    # Base difficulty from slope and soil
+    difficulty = 0.3 * slope + 0.2 * soil_factor
+    
+    # Add water crossing, protected area and settlement penalties
+    difficulty += 0.25 * water_difficulty
+    difficulty += 0.15 * protection_factor
+    difficulty += 0.1 * settlement_restriction
+    
+    # Normalize to 0.0-1.0 range
+    return min(max(difficulty, 0.0), 1.0)
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _segment_distance_sq(px: float, py: float, x1: float, y1: float, x2: float, y2: float) -> float:
+    """
+    Calculate the squared distance from a point to a line segment.
+    
+    Args:
+        px, py: Point coordinates
+        x1, y1: Line segment start
+        x2, y2: Line segment end
+        
+    Returns:
+        Squared distance from point to line
+    """
+    # Vector from start to end
+    dx = x2 - x1
+    dy = y2 - y1
+    
+    # If the line is just a point, return distance to that point
+    if dx == 0 and dy == 0:
+        return (px - x1) * (px - x1) + (py - y1) * (py - y1)
+    
+    # Calculate projection of point onto line
+    t = ((px - x1) * dx + (py - y1) * dy) / (dx*dx + dy*dy)
+    
+    # If projection is outside the line segment, use distance to closest endpoint
+    if t < 0:
+        return (px - x1) * (px - x1) + (py - y1) * (py - y1)
+    elif t > 1:
+        return (px - x2) * (px - x2) + (py - y2) * (py - y2)
+    
+    # Distance to the closest point on the line
+    offset_x = px - (x1 + t * dx)
+    offset_y = py - (y1 + t * dy)
+    return offset_x * offset_x + offset_y * offset_y
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _terrain_batch_kernel(lats: np.ndarray, lngs: np.ndarray, water_difficulty: np.ndarray, protection_factor: np.ndarray,
+                          settlement_restriction: np.ndarray, lut: np.ndarray, lat0: float, lng0: float,
+                          res: float, elevation_out: np.ndarray, slope_out: np.ndarray,
+                          soil_out: np.ndarray, difficulty_out: np.ndarray) -> None:
+    """
+    Fill the output arrays with the terrain of each point, see TerrainAnalyzer.compute_terrain_batch.
+    
+    lut, lat0, lng0 and res describe the elevation table, see _elevation_lut_kernel.
+    """
+    for i in prange(lats.shape[0]):
+        lat = lats[i]
+        lng = lngs[i]
+        elevation = _elevation_lut_kernel(lat, lng, lut, lat0, lng0, res)
+        slope = _slope_kernel(elevation, _elevation_lut_kernel(lat + _SLOPE_STEP, lng, lut, lat0, lng0, res),
+                              _elevation_lut_kernel(lat, lng + _SLOPE_STEP, lut, lat0, lng0, res))
+        soil = _soil_index_kernel(lat, lng)
+        
+        elevation_out[i] = elevation
+        slope_out[i] = slope
+        soil_out[i] = soil
+        difficulty_out[i] = _difficulty_kernel(slope, _SOIL_FACTOR_TABLE[soil], water_difficulty[i],
+                                               protection_factor[i], settlement_restriction[i])
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _first_segment_kernel(lat: float, lng: float, candidates: np.ndarray, start_lat: np.ndarray,
+                          start_lng: np.ndarray, end_lat: np.ndarray, end_lng: np.ndarray,
+                          reach_sq: np.ndarray):
+    """
+    Find the first candidate segment within its reach of a point.
+    
+    Returns:
+        Tuple of (segment index, squared distance), or (-1, 0.0) if no segment is in reach
+    """
+    for index in candidates:
+        dist_sq = _segment_distance_sq(lat, lng, start_lat[index], start_lng[index],
+                                       end_lat[index], end_lng[index])
+        if dist_sq <= reach_sq[index]:
+            return index, dist_sq
+    return -1, 0.0
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _first_circle_kernel(lat: float, lng: float, candidates: np.ndarray, center_lat: np.ndarray,
+                         center_lng: np.ndarray, radius_sq: np.ndarray) -> int:
+    """Find the first candidate circle containing a point, or -1 if there is none."""
+    for index in candidates:
+        dlat = lat - center_lat[index]
+        dlng = lng - center_lng[index]
+        if dlat * dlat + dlng * dlng <= radius_sq[index]:
+            return index
+    return -1
+
+class _TerrainPoint(NamedTuple):
+    """Terrain values of a point, see TerrainAnalyzer._compute_point."""
+    elevation: float
+    slope: float
+    soil: int  # Index into _SOIL_TYPES
+    protected: Tuple[bool, float]  # See is_protected_area
+    water: Tuple[bool, float]  # See is_water_crossing
+    road: Tuple[bool, float]  # See near_road
+    settlement: Tuple[bool, float]  # See near_settlement
+    difficulty: float
+    accessibility: float
+
+class TerrainBatch(NamedTuple):
+    """Terrain of a batch of points, one array element per point; see TerrainAnalyzer.compute_terrain_batch."""
+    elevation: np.ndarray
+    slope: np.ndarray
+    soil: np.ndarray  # Soil type indices, see get_soil_index
+    difficulty: np.ndarray
+
+class TerrainQuery(NamedTuple):
+    """Terrain features for a batch of points, one array element per point."""
+    water_mask: np.ndarray
+    water_diff: np.ndarray
+    road_mask: np.ndarray
+    road_bonus: np.ndarray
+    settlement_mask: np.ndarray
+    difficulty: np.ndarray
+
+class TerrainGrid(NamedTuple):
+    """Terrain values sampled on a regular grid, indexed by [lat_index, lng_index]."""
+    difficulty: np.ndarray
+    accessibility: np.ndarray
+    valid: np.ndarray
+
+# Cell size in degrees (~5 km) of the grid indices over river and road segments
+_SEGMENT_CELL_SIZE = 0.05
+
+class _GenerationalCache:
+    """
+    Cache bounded to two generations of entries.
+    
+    New entries go into the current generation. When it is full it becomes
+    the previous generation and the older entries are dropped; entries found
+    in the previous generation are moved back into the current one. Values
+    must not be None.
+    """
+    
+    __slots__ = ('_max_size', '_current', '_previous')
+    
+    def __init__(self, max_size: int):
+        """
+        Create an empty cache.
+        
+        Args:
+            max_size: Number of entries in each generation
+        """
+        self._max_size = max_size
+        self._current = {}
+        self._previous = {}
+    
+    def get(self, key: Any) -> Any:
+        """Get the value cached for a key, or None if there is none."""
+        value = self._current.get(key)
+        if value is None:
+            value = self._previous.pop(key, None)
+            if value is not None:
+                self[key] = value
+        return value
+    
+    def __setitem__(self, key: Any, value: Any) -> None:
+        """Cache a value, starting a new generation when the current one is full."""
+        self._current[key] = value
+        if len(self._current) >= self._max_size:
+            self._previous = self._current
+            self._current = {}
+    
+    def __len__(self) -> int:
+        """Get the number of cached entries."""
+        return len(self._current) + len(self._previous)
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._current = {}
+        self._previous = {}
+
+class _SegmentArrays(NamedTuple):
+    """Segments of rivers or roads as parallel arrays, one element per segment."""
+    polyline: np.ndarray  # Index of the river or road the segment belongs to
+    start_lat: np.ndarray
+    start_lng: np.ndarray
+    end_lat: np.ndarray
+    end_lng: np.ndarray
+    width_sq: np.ndarray
+    reach_sq: np.ndarray  # Squared distance at which a point still matches the segment
+    optimal_dist: np.ndarray  # Distance of the largest road bonus, twice the width
+    inv_width_x3: np.ndarray  # 1 / (3 * width), for the falloff of the road bonus
+    factor: np.ndarray  # Crossing difficulty of rivers, accessibility bonus of roads
+
+# Candidates of points outside all grid cells
+_NO_CANDIDATES = np.empty(0, dtype=np.intp)
+
+class _GridIndex:
+    """
+    Uniform grid of buckets over bounding boxes for point queries.
+    
+    Each box is listed in every cell that it overlaps, so a query only
+    needs to test the boxes listed in the cell of the point. bounds is the
+    (min latitude, min longitude, max latitude, max longitude) envelope of
+    all boxes, for rejecting far away points before any lookup.
+    """
+    
+    __slots__ = ('_cell_size', '_cells', 'bounds')
+    
+    def __init__(self, boxes: List[Tuple[float, float, float, float]], cell_size: float):
+        """
+        Build the index.
+        
+        Args:
+            boxes: List of (min latitude, min longitude, max latitude, max longitude)
+            cell_size: Size of the grid cells in degrees
+        """
+        self._cell_size = cell_size
+        
+        cells = {}
+        for index, (min_lat, min_lng, max_lat, max_lng) in enumerate(boxes):
+            for i in range(self._cell(min_lat), self._cell(max_lat) + 1):
+                for j in range(self._cell(min_lng), self._cell(max_lng) + 1):
+                    cells.setdefault((i, j), []).append(index)
+        self._cells = {cell: np.array(indices, dtype=np.intp) for cell, indices in cells.items()}
+        self.bounds = (min((box[0] for box in boxes), default=math.inf),
+                       min((box[1] for box in boxes), default=math.inf),
+                       max((box[2] for box in boxes), default=-math.inf),
+                       max((box[3] for box in boxes), default=-math.inf))
+    
+    def _cell(self, coordinate: float) -> int:
+        """Get the cell index of a coordinate."""
+        return math.floor(coordinate / self._cell_size)
+    
+    def candidates(self, lat: float, lng: float) -> np.ndarray:
+        """Get the indices of the boxes that may contain a point, in increasing order."""
+        return self._cells.get((self._cell(lat), self._cell(lng)), _NO_CANDIDATES)
+
+class _CircleIndex:
+    """Grid index over circular areas for point-in-circle queries."""
+    
+    __slots__ = ('_center_lat', '_center_lng', '_radius_sq', '_factor', '_grid')
+    
+    def __init__(self, circles: List[Tuple[float, float, float, float]]):
+        """
+        Build the index.
+        
+        Args:
+            circles: List of (center latitude, center longitude, radius, factor), radius in degrees
+        """
+        columns = np.array(circles, dtype=np.float64).reshape(-1, 4)
+        self._center_lat, self._center_lng, radius, self._factor = np.ascontiguousarray(columns.T)
+        self._radius_sq = radius * radius
+        self._grid = _GridIndex([(lat - radius, lng - radius, lat + radius, lng + radius)
+                                 for lat, lng, radius, _ in circles],
+                                max((radius for _, _, radius, _ in circles), default=1.0) or 1.0)
+    
+    def lookup(self, lat: float, lng: float) -> Tuple[bool, float]:
+        """Get (True, factor) of the first circle containing a point, or (False, 0.0) if there is none."""
+        min_lat, min_lng, max_lat, max_lng = self._grid.bounds
+        if not (min_lat <= lat <= max_lat and min_lng <= lng <= max_lng):
+            return (False, 0.0)
+        
+        index = _first_circle_kernel(lat, lng, self._grid.candidates(lat, lng), self._center_lat,
+                                     self._center_lng, self._radius_sq)
+        return (False, 0.0) if index < 0 else (True, float(self._factor[index]))
+    
+    def factor_array(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """Factor of the first circle containing each point, or 0.0 outside all circles."""
+        lats = np.asarray(lats, dtype=np.float64)[..., np.newaxis]
+        lngs = np.asarray(lngs, dtype=np.float64)[..., np.newaxis]
+        if not len(self._factor):
+            return np.zeros(np.broadcast_shapes(lats.shape, lngs.shape)[:-1])
+        
+        # One column per circle; argmax picks the first circle containing the point
+        dlat = lats - self._center_lat
+        dlng = lngs - self._center_lng
+        inside = dlat * dlat + dlng * dlng <= self._radius_sq
+        return np.where(np.any(inside, axis=-1), self._factor[np.argmax(inside, axis=-1)], 0.0)
+
 class TerrainAnalyzer:
     """Terrain analyzer for pipeline route planning."""
 
     def __init__(self):
         """Initialize the terrain analyzer."""
-        self.terrain_cache = {}
+        self.terrain_cache = _GenerationalCache(_TERRAIN_CACHE_SIZE)
         self.protected_areas = self._load_protected_areas()
         self.rivers = self._load_rivers()
         self.roads = self._load_roads()
         self.settlements = self._load_settlements()
+        # Only the compiled batch kernel gains from the table; a table lookup in
+        # Python is slower than the model itself
+        if HAVE_NUMBA:
+            self._elev_lut, self._lut_lat0, self._lut_lng0, self._lut_res = self._build_elev_lut(
+                _ELEVATION_LUT_BOUNDS, _ELEVATION_LUT_RESOLUTION)
+        self._protected_index = _CircleIndex([(*area['center'], area['radius'], area['impact_factor'])
+                                              for area in self.protected_areas])
+        self._settlement_index = _CircleIndex([(*settlement['center'], settlement['radius'],
+                                                settlement['restriction_factor'])
+                                               for settlement in self.settlements])
+        self._river_segments, self._river_index = self._index_segments(self.rivers, 1, 'crossing_difficulty')
+        self._road_segments, self._road_index = self._index_segments(self.roads, 5, 'accessibility_bonus')
         logger.info("TerrainAnalyzer initialized")
     
+    def clear_cache(self) -> None:
+        """Drop all cached terrain values."""
+        self.terrain_cache.clear()
+    
+    def _build_elev_lut(self, bounds: Tuple[float, float, float, float],
+                        res: float = 0.001) -> Tuple[np.ndarray, float, float, float]:
+        """
+        Tabulate the elevation model on a regular grid, see _elevation_lut_kernel.
+        
+        Args:
+            bounds: Area covered by the table as (south, north, west, east)
+            res: Grid spacing in degrees
+            
+        Returns:
+            Tuple of (table indexed by [lat_index, lng_index], latitude and
+            longitude of the first sample, grid spacing)
+        """
+        south, north, west, east = bounds
+        lat_axis = south + res * np.arange(round((north - south) / res) + 1)
+        lng_axis = west + res * np.arange(round((east - west) / res) + 1)
+        lats, lngs = np.meshgrid(lat_axis, lng_axis, indexing='ij')
+        return self._elevation_array(lats, lngs), south, west, res
+    
+    def _index_segments(self, polylines: List[Dict[str, Any]], width_factor: float,
+                        factor_key: str) -> Tuple[_SegmentArrays, _GridIndex]:
+        """
+        Split polylines into segments and index their bounding boxes.
+        
+        Args:
+            polylines: Rivers or roads with 'points' and 'width'
+            width_factor: Boxes are padded by this many widths, the farthest
+                distance at which a query still matches a segment
+            factor_key: Key of the polyline value to store with each segment
+            
+        Returns:
+            Tuple of (segment arrays, grid index over the segments)
+        """
+        rows = []
+        boxes = []
+        for index, polyline in enumerate(polylines):
+            width = polyline['width']
+            pad = width * width_factor
+            for start, end in zip(polyline['points'], polyline['points'][1:]):
+                rows.append((index, *start, *end, width * width, pad * pad, width * 2, 1.0 / (width * 3),
+                             polyline[factor_key]))
+                boxes.append((min(start[0], end[0]) - pad, min(start[1], end[1]) - pad,
+                              max(start[0], end[0]) + pad, max(start[1], end[1]) + pad))
+        
+        columns = np.array(rows, dtype=np.float64).reshape(-1, len(_SegmentArrays._fields)).T
+        segments = _SegmentArrays(columns[0].astype(np.intp),
+                                  *(np.ascontiguousarray(column) for column in columns[1:]))
+        return segments, _GridIndex(boxes, _SEGMENT_CELL_SIZE)
+    
     def _load_protected_areas(self) -> List[Dict[str, Any]]:
         """
         Load protected areas data.
@@ -133,27 +595,7 @@ class TerrainAnalyzer:
         """
         # In a real implementation, this would query a DEM (Digital Elevation Model)
         # For this implementation, we'll generate a realistic elevation model for the region
-        cache_key = f"{lat:.5f}_{lng:.5f}_elev"
-        if cache_key in self.terrain_cache:
-            return self.terrain_cache[cache_key]
-        
-        # Base elevation for Irkutsk region (around 500m)
-        base_elevation = 500
-        
-        # Add some variation based on coordinates
-        # This creates a realistic terrain pattern
-        x_factor = math.sin(lat * 10) * math.cos(lng * 8) * 200
-        y_factor = math.sin(lng * 12) * math.cos(lat * 9) * 150
-        
-        # Add some random variation (small hills)
-        random_factor = random.uniform(-50, 50)
-        
-        # Combine factors for final elevation
-        elevation = base_elevation + x_factor + y_factor + random_factor
-        
-        # Cache the result
-        self.terrain_cache[cache_key] = elevation
-        return elevation
+        return self._compute_point(lat, lng).elevation
     
     def get_slope(self, lat: float, lng: float) -> float:
         """
@@ -166,31 +608,20 @@ class TerrainAnalyzer:
         Returns:
             Slope as a value between 0.0 (flat) and 1.0 (very steep)
         """
-        cache_key = f"{lat:.5f}_{lng:.5f}_slope"
-        if cache_key in self.terrain_cache:
-            return self.terrain_cache[cache_key]
-        
-        # Calculate slope based on elevation difference with nearby points
-        grid_size = 0.001  # About 100m
-        
-        elev_center = self.get_elevation(lat, lng)
-        elev_north = self.get_elevation(lat + grid_size, lng)
-        elev_east = self.get_elevation(lat, lng + grid_size)
-        
-        # Calculate slope based on elevation differences
-        delta_north = abs(elev_north - elev_center)
-        delta_east = abs(elev_east - elev_center)
-        
-        # Convert to a 0.0-1.0 scale where 1.0 is extremely steep (approx 45 degrees or more)
-        slope_north = min(delta_north / 100, 1.0)
-        slope_east = min(delta_east / 100, 1.0)
-        
-        # Use the max slope direction
-        slope = max(slope_north, slope_east)
+        return self._compute_point(lat, lng).slope
+    
+    def get_soil_index(self, lat: float, lng: float) -> int:
+        """
+        Get the soil type at a specific point as an index.
         
-        # Cache the result
-        self.terrain_cache[cache_key] = slope
-        return slope
+        Args:
+            lat: Latitude coordinate
+            lng: Longitude coordinate
+            
+        Returns:
+            Index of the soil type in 'clay', 'loam', 'sand', 'rock', 'peat'
+        """
+        return self._compute_point(lat, lng).soil
     
     def get_soil_type(self, lat: float, lng: float) -> str:
         """
@@ -203,27 +634,7 @@ class TerrainAnalyzer:
         Returns:
             Soil type as a string
         """
-        cache_key = f"{lat:.5f}_{lng:.5f}_soil"
-        if cache_key in self.terrain_cache:
-            return self.terrain_cache[cache_key]
-        
-        # In a real implementation, this would query a soils database
-        # For this implementation, we'll generate consistent soil types
-        
-        # Use the coordinates to deterministically assign soil types
-        # This ensures consistent results for the same coordinate
-        soil_types = ['clay', 'loam', 'sand', 'rock', 'peat']
-        
-        # Generate a value between 0 and 1 based on coordinates
-        value = ((math.sin(lat * 100) + 1) / 2 + (math.cos(lng * 100) + 1) / 2) / 2
-        
-        # Select soil type based on the value
-        index = min(int(value * len(soil_types)), len(soil_types) - 1)
-        soil_type = soil_types[index]
-        
-        # Cache the result
-        self.terrain_cache[cache_key] = soil_type
-        return soil_type
+        return _SOIL_TYPES[self.get_soil_index(lat, lng)]
     
     def is_protected_area(self, lat: float, lng: float) -> Tuple[bool, float]:
         """
@@ -236,22 +647,7 @@ class TerrainAnalyzer:
         Returns:
             Tuple of (is_protected, impact_factor)
         """
-        cache_key = f"{lat:.5f}_{lng:.5f}_protected"
-        if cache_key in self.terrain_cache:
-            return self.terrain_cache[cache_key]
-        
-        for area in self.protected_areas:
-            center_lat, center_lng = area['center']
-            distance = math.sqrt((lat - center_lat)**2 + (lng - center_lng)**2)
-            
-            if distance <= area['radius']:
-                result = (True, area['impact_factor'])
-                self.terrain_cache[cache_key] = result
-                return result
-        
-        result = (False, 0.0)
-        self.terrain_cache[cache_key] = result
-        return result
+        return self._compute_point(lat, lng).protected
     
     def is_water_crossing(self, lat: float, lng: float) -> Tuple[bool, float]:
         """
@@ -264,64 +660,20 @@ class TerrainAnalyzer:
         Returns:
             Tuple of (is_water_crossing, difficulty_factor)
         """
-        cache_key = f"{lat:.5f}_{lng:.5f}_water"
-        if cache_key in self.terrain_cache:
-            return self.terrain_cache[cache_key]
-        
-        for river in self.rivers:
-            for i in range(len(river['points']) - 1):
-                start_lat, start_lng = river['points'][i]
-                end_lat, end_lng = river['points'][i + 1]
-                
-                # Check if point is near this river segment
-                dist = self._point_to_line_distance(
-                    lat, lng, start_lat, start_lng, end_lat, end_lng)
-                
-                if dist <= river['width']:
-                    result = (True, river['crossing_difficulty'])
-                    self.terrain_cache[cache_key] = result
-                    return result
-        
-        result = (False, 0.0)
-        self.terrain_cache[cache_key] = result
-        return result
+        return self._compute_point(lat, lng).water
     
-    def _point_to_line_distance(self, px: float, py: float, x1: float, y1: float, 
-                               x2: float, y2: float) -> float:
-        """
-        Calculate distance from a point to a line segment.
-        
-        Args:
-            px, py: Point coordinates
-            x1, y1: Line segment start
-            x2, y2: Line segment end
-            
-        Returns:
-            Distance from point to line
-        """
-        # Vector from start to end
-        dx = x2 - x1
-        dy = y2 - y1
-        
-        # If the line is just a point, return distance to that point
-        if dx == 0 and dy == 0:
-            return math.sqrt((px - x1)**2 + (py - y1)**2)
-        
-        # Calculate projection of point onto line
-        t = ((px - x1) * dx + (py - y1) * dy) / (dx*dx + dy*dy)
-        
-        # If projection is outside the line segment, use distance to closest endpoint
-        if t < 0:
-            return math.sqrt((px - x1)**2 + (py - y1)**2)
-        elif t > 1:
-            return math.sqrt((px - x2)**2 + (py - y2)**2)
-        
-        # Calculate closest point on line
-        closest_x = x1 + t * dx
-        closest_y = y1 + t * dy
-        
-        # Return distance to closest point
-        return math.sqrt((px - closest_x)**2 + (py - closest_y)**2)
+    def _water_crossing(self, lat: float, lng: float) -> Tuple[bool, float]:
+        """Look up the water crossing of a point, see is_water_crossing."""
+        min_lat, min_lng, max_lat, max_lng = self._river_index.bounds
+        if not (min_lat <= lat <= max_lat and min_lng <= lng <= max_lng):
+            return (False, 0.0)
+        
+        # Find the first river segment within its width of the point
+        rivers = self._river_segments
+        index, _ = _first_segment_kernel(lat, lng, self._river_index.candidates(lat, lng), rivers.start_lat,
+                                         rivers.start_lng, rivers.end_lat, rivers.end_lng, rivers.reach_sq)
+        
+        return (False, 0.0) if index < 0 else (True, float(rivers.factor[index]))
     
     def near_road(self, lat: float, lng: float) -> Tuple[bool, float]:
         """
@@ -337,43 +689,43 @@ class TerrainAnalyzer:
             Tuple of (is_near_road, accessibility_bonus)
             accessibility_bonus is positive for optimal proximity, negative for being directly on road
         """
-        cache_key = f"{lat:.5f}_{lng:.5f}_road"
-        if cache_key in self.terrain_cache:
-            return self.terrain_cache[cache_key]
+        return self._compute_point(lat, lng).road
+    
+    def _road_access(self, lat: float, lng: float) -> Tuple[bool, float]:
+        """Look up the road proximity of a point, see near_road."""
+        min_lat, min_lng, max_lat, max_lng = self._road_index.bounds
+        if not (min_lat <= lat <= max_lat and min_lng <= lng <= max_lng):
+            return (False, 0.0)
+        
+        # Find the first road segment within 5x its width of the point
+        roads = self._road_segments
+        index, dist_sq = _first_segment_kernel(lat, lng, self._road_index.candidates(lat, lng), roads.start_lat,
+                                               roads.start_lng, roads.end_lat, roads.end_lng, roads.reach_sq)
+        
+        if index < 0:
+            result = (False, 0.0)
+        
+        # If directly on the road or very close (inside road width) - not ideal for pipelines
+        elif dist_sq <= roads.width_sq[index]:
+            # Penalize being directly ON roads (slight negative bonus)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Position %s,%s is directly ON road", lat, lng)
+            result = (True, -0.2)  # Negative bonus for being directly on road
+        
+        # Optimal distance: close enough for maintenance access, but not ON the road
+        # Between 1x and 5x the road width
+        else:
+            # Calculate ideal bonus based on distance from road
+            # Maximum bonus at around 2x road width, decreasing as you get closer or farther
+            optimal_dist = roads.optimal_dist[index]  # Ideal distance from road center
+            proximity_factor = 1.0 - abs(math.sqrt(dist_sq) - optimal_dist) * roads.inv_width_x3[index]
+            adjusted_bonus = float(roads.factor[index] * proximity_factor)
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Position %s,%s is at optimal distance from road, bonus: %.2f",
+                             lat, lng, adjusted_bonus)
+            result = (True, adjusted_bonus)
         
-        for road in self.roads:
-            for i in range(len(road['points']) - 1):
-                start_lat, start_lng = road['points'][i]
-                end_lat, end_lng = road['points'][i + 1]
-                
-                # Check if point is near this road segment
-                dist = self._point_to_line_distance(
-                    lat, lng, start_lat, start_lng, end_lat, end_lng)
-                
-                # If directly on the road or very close (inside road width) - not ideal for pipelines
-                if dist <= road['width']:
-                    # Penalize being directly ON roads (slight negative bonus)
-                    logger.debug(f"Position {lat},{lng} is directly ON road")
-                    result = (True, -0.2)  # Negative bonus for being directly on road
-                    self.terrain_cache[cache_key] = result
-                    return result
-                
-                # Optimal distance: close enough for maintenance access, but not ON the road
-                # Between 1x and 5x the road width
-                elif dist <= road['width'] * 5:
-                    # Calculate ideal bonus based on distance from road
-                    # Maximum bonus at around 2x road width, decreasing as you get closer or farther
-                    optimal_dist = road['width'] * 2  # Ideal distance from road center
-                    proximity_factor = 1.0 - abs(dist - optimal_dist) / (road['width'] * 3)
-                    adjusted_bonus = road['accessibility_bonus'] * proximity_factor
-                    
-                    logger.debug(f"Position {lat},{lng} is at optimal distance from road, bonus: {adjusted_bonus:.2f}")
-                    result = (True, adjusted_bonus)
-                    self.terrain_cache[cache_key] = result
-                    return result
-        
-        result = (False, 0.0)
-        self.terrain_cache[cache_key] = result
         return result
     
     def near_settlement(self, lat: float, lng: float) -> Tuple[bool, float]:
@@ -387,22 +739,7 @@ class TerrainAnalyzer:
         Returns:
             Tuple of (is_near_settlement, restriction_factor)
         """
-        cache_key = f"{lat:.5f}_{lng:.5f}_settlement"
-        if cache_key in self.terrain_cache:
-            return self.terrain_cache[cache_key]
-        
-        for settlement in self.settlements:
-            center_lat, center_lng = settlement['center']
-            distance = math.sqrt((lat - center_lat)**2 + (lng - center_lng)**2)
-            
-            if distance <= settlement['radius']:
-                result = (True, settlement['restriction_factor'])
-                self.terrain_cache[cache_key] = result
-                return result
-        
-        result = (False, 0.0)
-        self.terrain_cache[cache_key] = result
-        return result
+        return self._compute_point(lat, lng).settlement
     
     def get_terrain_difficulty(self, lat: float, lng: float) -> float:
         """
@@ -415,48 +752,234 @@ class TerrainAnalyzer:
         Returns:
             Terrain difficulty as a value between 0.0 (easy) and 1.0 (extremely difficult)
         """
-        cache_key = f"{lat:.5f}_{lng:.5f}_difficulty"
-        if cache_key in self.terrain_cache:
-            return self.terrain_cache[cache_key]
-        
-        # Calculate components of difficulty
-        slope = self.get_slope(lat, lng)
-        soil_type = self.get_soil_type(lat, lng)
-        is_protected, protection_factor = self.is_protected_area(lat, lng)
-        is_water, water_difficulty = self.is_water_crossing(lat, lng)
-        is_settlement, settlement_restriction = self.near_settlement(lat, lng)
-        
-        # Soil difficulty factors
-        soil_factors = {
-            'clay': 0.4,
-            'loam': 0.2,
-            'sand': 0.3,
-            'rock': 0.8,
-            'peat': 0.6
-        }
+        return self._compute_point(lat, lng).difficulty
+    
+    def _compute_point(self, lat: float, lng: float) -> _TerrainPoint:
+        """
+        Calculate all terrain values of a point in one pass.
         
-        # Base difficulty from slope and soil
-        difficulty = 0.3 * slope + 0.2 * soil_factors.get(soil_type, 0.3)
+        The values are cached together as one record per point, which the
+        public getters read.
         
-        # Add water crossing difficulty if applicable
-        if is_water:
-            difficulty += 0.25 * water_difficulty
+        Args:
+            lat: Latitude coordinate
+            lng: Longitude coordinate
+            
+        Returns:
+            _TerrainPoint of the point
+        """
+        # math.floor of a float is cheaper than round and gives the same buckets up to ties
+        cache_key = (math.floor(lat * 1e5 + 0.5), math.floor(lng * 1e5 + 0.5))
+        cached = self.terrain_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        elevation = _elevation_kernel(lat, lng)
+        
+        # Calculate slope based on elevation difference with points about 100m away
+        slope = _slope_kernel(elevation, _elevation_kernel(lat + _SLOPE_STEP, lng),
+                              _elevation_kernel(lat, lng + _SLOPE_STEP))
         
-        # Add protected area penalty if applicable
-        if is_protected:
-            difficulty += 0.15 * protection_factor
+        # In a real implementation, this would query a soils database;
+        # the coordinates deterministically assign soil types
+        soil = _soil_index_kernel(lat, lng)
         
-        # Add settlement restriction if applicable
-        if is_settlement:
-            difficulty += 0.1 * settlement_restriction
+        # Spatial features; their factors are 0.0 outside the areas
+        protected = self._protected_index.lookup(lat, lng)
+        water = self._water_crossing(lat, lng)
+        road = self._road_access(lat, lng)
+        settlement = self._settlement_index.lookup(lat, lng)
         
-        # Normalize to 0.0-1.0 range
-        difficulty = min(max(difficulty, 0.0), 1.0)
+        # Combine the components of difficulty
+        difficulty = _difficulty_kernel(slope, _SOIL_FACTOR_TABLE[soil], water[1], protected[1], settlement[1])
         
-        # Cache the result
-        self.terrain_cache[cache_key] = difficulty
+        # Accessibility is the inverse of difficulty, with a bonus near roads
+        accessibility = 1.0 - difficulty * 0.6 + road[1] * 0.4
+        
+        result = _TerrainPoint(elevation, slope, soil, protected, water, road, settlement, difficulty,
+                               min(max(accessibility, 0.0), 1.0))
+        self.terrain_cache[cache_key] = result
+        return result
+    
+    def _elevation_array(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """Elevations of many points at once, see get_elevation."""
+        x_factor = np.sin(lats * 10) * np.cos(lngs * 8) * 200
+        y_factor = np.sin(lngs * 12) * np.cos(lats * 9) * 150
+        hill_factor = np.sin(lats * 37) * np.cos(lngs * 41) * 30
+        return 500 + x_factor + y_factor + hill_factor
+    
+    def _slope_array(self, lats: np.ndarray, lngs: np.ndarray, elev_center: np.ndarray) -> np.ndarray:
+        """Slopes of many points with known elevations at once, see get_slope."""
+        elev_north = self._elevation_array(lats + _SLOPE_STEP, lngs)
+        elev_east = self._elevation_array(lats, lngs + _SLOPE_STEP)
+        
+        slope_north = np.minimum(np.abs(elev_north - elev_center) / 100, 1.0)
+        slope_east = np.minimum(np.abs(elev_east - elev_center) / 100, 1.0)
+        return np.maximum(slope_north, slope_east)
+    
+    def _soil_index_array(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """Soil type indices of many points at once, see get_soil_index."""
+        value = ((np.sin(lats * 100) + 1) / 2 + (np.cos(lngs * 100) + 1) / 2) / 2
+        return np.minimum((value * len(_SOIL_TYPES)).astype(np.intp), len(_SOIL_TYPES) - 1)
+    
+    def _segment_distance_sq_array(self, px: np.ndarray, py: np.ndarray, x1: float, y1: float,
+                                   x2: float, y2: float) -> np.ndarray:
+        """Squared distances from many points to a line segment, see _segment_distance_sq."""
+        dx = x2 - x1
+        dy = y2 - y1
+        start_distance_sq = (px - x1) * (px - x1) + (py - y1) * (py - y1)
+        if dx == 0 and dy == 0:
+            return start_distance_sq
+        
+        t = ((px - x1) * dx + (py - y1) * dy) / (dx*dx + dy*dy)
+        end_distance_sq = (px - x2) * (px - x2) + (py - y2) * (py - y2)
+        offset_x = px - (x1 + t * dx)
+        offset_y = py - (y1 + t * dy)
+        line_distance_sq = offset_x * offset_x + offset_y * offset_y
+        return np.where(t < 0, start_distance_sq, np.where(t > 1, end_distance_sq, line_distance_sq))
+    
+    def _water_crossing_array(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """Crossing difficulty of many points at once, 0.0 away from water; see is_water_crossing."""
+        difficulty = np.zeros(np.broadcast_shapes(np.shape(lats), np.shape(lngs)))
+        found = np.zeros(difficulty.shape, dtype=bool)
+        rivers = self._river_segments
+        for index in range(len(rivers.polyline)):
+            dist_sq = self._segment_distance_sq_array(lats, lngs, rivers.start_lat[index], rivers.start_lng[index],
+                                                      rivers.end_lat[index], rivers.end_lng[index])
+            crossing = ~found & (dist_sq <= rivers.reach_sq[index])
+            difficulty[crossing] = rivers.factor[index]
+            found |= crossing
         return difficulty
     
+    def _road_bonus_array(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """Accessibility bonus of many points at once, 0.0 away from roads; see near_road."""
+        return self._road_access_array(lats, lngs)[1]
+    
+    def _road_access_array(self, lats: np.ndarray, lngs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Road proximity of many points at once as arrays of (is_near_road, accessibility_bonus), see near_road."""
+        bonus = np.zeros(np.broadcast_shapes(np.shape(lats), np.shape(lngs)))
+        found = np.zeros(bonus.shape, dtype=bool)
+        roads = self._road_segments
+        for index in range(len(roads.polyline)):
+            dist_sq = self._segment_distance_sq_array(lats, lngs, roads.start_lat[index], roads.start_lng[index],
+                                                      roads.end_lat[index], roads.end_lng[index])
+            
+            # Directly on the road: slight penalty
+            on_road = ~found & (dist_sq <= roads.width_sq[index])
+            bonus[on_road] = -0.2
+            found |= on_road
+            
+            # Optimal distance between 1x and 5x the road width, best at 2x
+            near = ~found & (dist_sq <= roads.reach_sq[index])
+            distance = np.sqrt(dist_sq[near])
+            proximity_factor = 1.0 - np.abs(distance - roads.optimal_dist[index]) * roads.inv_width_x3[index]
+            bonus[near] = roads.factor[index] * proximity_factor
+            found |= near
+        return found, bonus
+    
+    def _accessibility_array(self, lats: np.ndarray, lngs: np.ndarray, difficulty: np.ndarray) -> np.ndarray:
+        """Accessibility of many points with known terrain difficulties at once, see get_accessibility."""
+        return np.clip(1.0 - difficulty * 0.6 + self._road_bonus_array(lats, lngs) * 0.4, 0.0, 1.0)
+    
+    def compute_terrain_batch(self, lats: np.ndarray, lngs: np.ndarray) -> TerrainBatch:
+        """
+        Compute elevation, slope, soil type and terrain difficulty for many points at once.
+        
+        Same models as get_elevation, get_slope, get_soil_index and
+        get_terrain_difficulty, without going through the point cache.
+        
+        Args:
+            lats: 1-D array of latitude coordinates
+            lngs: 1-D array of longitude coordinates
+            
+        Returns:
+            TerrainBatch with one element per point in each array
+        """
+        lats = np.ascontiguousarray(lats, dtype=np.float64)
+        lngs = np.ascontiguousarray(lngs, dtype=np.float64)
+        
+        # The factors are 0.0 outside water, protected areas and settlements
+        water_difficulty = self._water_crossing_array(lats, lngs)
+        protection_factor = self._protected_index.factor_array(lats, lngs)
+        settlement_restriction = self._settlement_index.factor_array(lats, lngs)
+        
+        if HAVE_NUMBA:
+            batch = TerrainBatch(np.empty(len(lats)), np.empty(len(lats)),
+                                 np.empty(len(lats), dtype=np.intp), np.empty(len(lats)))
+            _terrain_batch_kernel(lats, lngs, water_difficulty, protection_factor,
+                                  settlement_restriction, self._elev_lut, self._lut_lat0, self._lut_lng0,
+                                  self._lut_res, *batch)
+            return batch
+        
+        elevation = self._elevation_array(lats, lngs)
+        slope = self._slope_array(lats, lngs, elevation)
+        soil = self._soil_index_array(lats, lngs)
+        
+        difficulty = 0.3 * slope + 0.2 * np.array(_SOIL_FACTOR_TABLE)[soil]
+        difficulty += 0.25 * water_difficulty
+        difficulty += 0.15 * protection_factor
+        difficulty += 0.1 * settlement_restriction
+        return TerrainBatch(elevation, slope, soil, np.clip(difficulty, 0.0, 1.0))
+    
+    def difficulty_batch(self, points: np.ndarray) -> np.ndarray:
+        """
+        Calculate terrain difficulty for many points at once, see compute_terrain_batch.
+        
+        Args:
+            points: Array of shape (N, 2) of (latitude, longitude) coordinates
+            
+        Returns:
+            Array of N terrain difficulties (0.0-1.0)
+        """
+        points = np.asarray(points, dtype=np.float64)
+        return self.compute_terrain_batch(points[:, 0], points[:, 1]).difficulty
+    
+    def query_batch(self, lats: np.ndarray, lngs: np.ndarray) -> TerrainQuery:
+        """
+        Query water crossings, road and settlement proximity and terrain difficulty
+        for many points at once.
+        
+        Args:
+            lats: Array of latitude coordinates
+            lngs: Array of longitude coordinates
+            
+        Returns:
+            TerrainQuery with one element per point in each array
+        """
+        lats = np.ascontiguousarray(lats, dtype=np.float64)
+        lngs = np.ascontiguousarray(lngs, dtype=np.float64)
+        
+        # Crossing difficulties and restriction factors are positive inside
+        # rivers and settlements and 0.0 outside
+        water_diff = self._water_crossing_array(lats, lngs)
+        road_mask, road_bonus = self._road_access_array(lats, lngs)
+        settlement_mask = self._settlement_index.factor_array(lats, lngs) > 0.0
+        difficulty = self.compute_terrain_batch(lats, lngs).difficulty
+        
+        return TerrainQuery(water_diff > 0.0, water_diff, road_mask, road_bonus, settlement_mask, difficulty)
+    
+    def sample_grid(self, lats: np.ndarray, lngs: np.ndarray) -> TerrainGrid:
+        """
+        Sample terrain difficulty, accessibility and position validity on a grid.
+        
+        Args:
+            lats: Latitudes of the grid rows
+            lngs: Longitudes of the grid columns
+            
+        Returns:
+            TerrainGrid with arrays of shape (len(lats), len(lngs))
+        """
+        shape = (len(lats), len(lngs))
+        
+        # Evaluate the terrain on the whole grid at once, see get_terrain_data
+        grid_lats, grid_lngs = (grid.ravel() for grid in np.meshgrid(
+            np.asarray(lats, dtype=np.float64), np.asarray(lngs, dtype=np.float64), indexing='ij'))
+        terrain = self.compute_terrain_batch(grid_lats, grid_lngs)
+        accessibility = self._accessibility_array(grid_lats, grid_lngs, terrain.difficulty)
+        valid = self._valid_position_array(grid_lats, grid_lngs)
+        
+        return TerrainGrid(terrain.difficulty.reshape(shape), accessibility.reshape(shape), valid.reshape(shape))
+    
     def get_accessibility(self, lat: float, lng: float) -> float:
         """
         Calculate accessibility score at a specific point.
@@ -468,25 +991,7 @@ class TerrainAnalyzer:
         Returns:
             Accessibility as a value between 0.0 (inaccessible) and 1.0 (easily accessible)
         """
-        cache_key = f"{lat:.5f}_{lng:.5f}_access"
-        if cache_key in self.terrain_cache:
-            return self.terrain_cache[cache_key]
-        
-        # Base accessibility (inverse of terrain difficulty)
-        terrain_difficulty = self.get_terrain_difficulty(lat, lng)
-        accessibility = 1.0 - terrain_difficulty * 0.6  # Base accessibility
-        
-        # Check if location is near a road
-        is_near_road, road_bonus = self.near_road(lat, lng)
-        if is_near_road:
-            accessibility += road_bonus * 0.4  # Bonus for being near a road
-        
-        # Normalize to 0.0-1.0 range
-        accessibility = min(max(accessibility, 0.0), 1.0)
-        
-        # Cache the result
-        self.terrain_cache[cache_key] = accessibility
-        return accessibility
+        return self._compute_point(lat, lng).accessibility
     
     def is_valid_position(self, lat: float, lng: float) -> bool:
         """
@@ -505,48 +1010,29 @@ class TerrainAnalyzer:
             
         # Check if in restricted zones (national parks, cities, protected areas)
         
-        # Major cities to avoid
-        restricted_cities = [
-            # City center coordinates and radius in degrees
-            # Иркутск
-            {"lat": 52.3, "lng": 104.3, "radius": 0.12, "name": "Иркутск"},
-            # Ангарск
-            {"lat": 52.5, "lng": 103.9, "radius": 0.08, "name": "Ангарск"},
-            # Шелехов
-            {"lat": 52.2, "lng": 104.08, "radius": 0.04, "name": "Шелехов"},
-            # Усолье-Сибирское
-            {"lat": 52.75, "lng": 103.65, "radius": 0.05, "name": "Усолье-Сибирское"}
-        ]
-        
-        # Protected natural areas to avoid
-        protected_areas = [
-            # Прибайкальский национальный парк
-            {"lat": 53.2, "lng": 107.35, "radius": 0.35, "name": "Прибайкальский национальный парк"},
-            # Байкало-Ленский заповедник
-            {"lat": 53.9, "lng": 108.0, "radius": 0.40, "name": "Байкало-Ленский заповедник"},
-            # Байкальский заповедник
-            {"lat": 51.5, "lng": 105.0, "radius": 0.30, "name": "Байкальский заповедник"}
-        ]
-        
         # Check if point is within restricted cities or very close to cities
-        for city in restricted_cities:
-            city_distance = math.sqrt((lat - city["lat"])**2 + (lng - city["lng"])**2)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for city_lat, city_lng, radius_sq, margin_sq, name in _RESTRICTED_CITIES:
+            dlat = lat - city_lat
+            dlng = lng - city_lng
+            city_distance_sq = dlat * dlat + dlng * dlng
             
             # Строго запрещаем строительство внутри городов
-            if city_distance <= city["radius"]:
-                logger.debug(f"Position {lat},{lng} is inside restricted city area {city['name']}")
+            if city_distance_sq <= radius_sq:
+                logger.debug("Position %s,%s is inside restricted city area %s", lat, lng, name)
                 return False
                 
             # Также предупреждаем о близости к границам города (в пределах 1.2 радиуса)
-            if city_distance <= city["radius"] * 1.2:
-                logger.debug(f"Position {lat},{lng} is close to restricted city area {city['name']}")
+            if debug and city_distance_sq <= margin_sq:
+                logger.debug("Position %s,%s is close to restricted city area %s", lat, lng, name)
                 # Это не запрещено, но будет учитываться в оценке маршрута
                 
         # Check if point is within protected areas
-        for area in protected_areas:
-            area_distance = math.sqrt((lat - area["lat"])**2 + (lng - area["lng"])**2)
-            if area_distance <= area["radius"]:
-                logger.debug(f"Position {lat},{lng} is inside protected area {area['name']}")
+        for area_lat, area_lng, radius_sq, name in _RESTRICTED_AREAS:
+            dlat = lat - area_lat
+            dlng = lng - area_lng
+            if dlat * dlat + dlng * dlng <= radius_sq:
+                logger.debug("Position %s,%s is inside protected area %s", lat, lng, name)
                 return False
         
         # For this implementation, make most positions valid to ensure paths can be found
@@ -565,6 +1051,23 @@ class TerrainAnalyzer:
         # Otherwise allow the position
         return True
     
+    def _valid_position_array(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """Validity of many positions at once, see is_valid_position."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        valid = (np.abs(lats) <= 90) & (np.abs(lngs) <= 180)
+        
+        # Restricted cities and protected natural areas
+        for city_lat, city_lng, radius_sq, _, _ in _RESTRICTED_CITIES:
+            valid &= (lats - city_lat)**2 + (lngs - city_lng)**2 > radius_sq
+        for area_lat, area_lng, radius_sq, _ in _RESTRICTED_AREAS:
+            valid &= (lats - area_lat)**2 + (lngs - area_lng)**2 > radius_sq
+        
+        # Protected areas and settlements with the highest impact; the factors are 0.0 outside them
+        valid &= self._protected_index.factor_array(lats, lngs) <= 0.95
+        valid &= self._settlement_index.factor_array(lats, lngs) <= 0.95
+        return valid
+    
     def get_terrain_data(self, north: float, south: float, east: float, west: float) -> Dict[str, Any]:
         """
         Get terrain data for a rectangular area.
@@ -576,24 +1079,28 @@ class TerrainAnalyzer:
             west: Western boundary longitude
             
         Returns:
-            Dictionary with terrain data
+            Dictionary with terrain data. 'grid' holds the 'lats' and 'lngs' axes
+            and float32 'elevation', 'difficulty' and 'accessibility' arrays of
+            shape (len(lats), len(lngs)).
         """
         # Generate grid of terrain data
         grid_size = 0.01  # Grid resolution (approx 1km)
-        terrain_grid = []
-        
-        for lat in self._frange(south, north, grid_size):
-            row = []
-            for lng in self._frange(west, east, grid_size):
-                cell_data = {
-                    'position': (lat, lng),
-                    'elevation': self.get_elevation(lat, lng),
-                    'difficulty': self.get_terrain_difficulty(lat, lng),
-                    'accessibility': self.get_accessibility(lat, lng)
-                }
-                row.append(cell_data)
-            
-            terrain_grid.append(row)
+        lats = self._grid_axis(south, north, grid_size)
+        lngs = self._grid_axis(west, east, grid_size)
+        
+        # Evaluate the terrain on the whole grid at once
+        grid_lats, grid_lngs = (grid.ravel() for grid in np.meshgrid(lats, lngs, indexing='ij'))
+        terrain = self.compute_terrain_batch(grid_lats, grid_lngs)
+        accessibility = self._accessibility_array(grid_lats, grid_lngs, terrain.difficulty)
+        
+        # Values are indexed by [lat_index, lng_index]; the arrays are read-only
+        # because callers may cache and share the result
+        terrain_grid = {'lats': lats, 'lngs': lngs}
+        for name, values in (('elevation', terrain.elevation), ('difficulty', terrain.difficulty),
+                             ('accessibility', accessibility)):
+            terrain_grid[name] = values.astype(np.float32).reshape(len(lats), len(lngs))
+        for values in terrain_grid.values():
+            values.flags.writeable = False
         
         # Get features in the area
         features = []
@@ -678,9 +1185,30 @@ class TerrainAnalyzer:
         Returns:
             List of floating point values
         """
-        result = []
-        current = start
-        while current <= stop:
-            result.append(current)
-            current += step
-        return result
+        return self._grid_axis(start, stop, step).tolist()
+    
+    def _grid_axis(self, start: float, stop: float, step: float) -> np.ndarray:
+        """
+        Evenly spaced values from start up to and including stop, see _frange.
+        
+        Each value is computed as start + i * step, so rounding errors don't
+        accumulate; a stop within 1e-9 steps of the last value is included.
+        """
+        count = max(math.floor((stop - start) / step + 1e-9) + 1, 0)
+        return start + step * np.arange(count)
+
+# Compile the JIT kernels at import time so the first request isn't penalized
+if HAVE_NUMBA:
+    _elevation_kernel(52.3, 104.3)
+    _elevation_lut_kernel(52.3, 104.3, np.zeros((2, 2)), 52.0, 104.0, 1.0)
+    _slope_kernel(500.0, 510.0, 505.0)
+    _soil_index_kernel(52.3, 104.3)
+    _difficulty_kernel(0.5, 0.4, 0.0, 0.0, 0.0)
+    _segment_distance_sq(52.3, 104.3, 52.2, 104.1, 52.4, 104.5)
+    _first_segment_kernel(52.3, 104.3, np.zeros(1, dtype=np.intp), np.full(1, 52.2), np.full(1, 104.1),
+                          np.full(1, 52.4), np.full(1, 104.5), np.full(1, 1e-4))
+    _first_circle_kernel(52.3, 104.3, np.zeros(1, dtype=np.intp), np.full(1, 52.3), np.full(1, 104.3),
+                         np.full(1, 0.1))
+    _terrain_batch_kernel(np.full(1, 52.3), np.full(1, 104.3), np.zeros(1), np.zeros(1),
+                          np.zeros(1), np.zeros((2, 2)), 52.0, 104.0, 1.0, np.empty(1), np.empty(1),
+                          np.empty(1, dtype=np.intp), np.empty(1))
@@ -8,51 +8,358 @@ coordinate parsing.
 
 import math
 import re
+from functools import lru_cache
 from typing import Tuple, List, Dict, Any
 
-def haversine_distance(point1: Tuple[float, float], point2: Tuple[float, float]) -> float:
+import numpy as np
+
+from route_planner._jit import HAVE_NUMBA, njit
+
+# Mean Earth radius in kilometers
+EARTH_RADIUS_KM = 6371.0
+
+# Factors folded into the distance formulas: the Earth's diameter, and
+# degrees to radians with the same value math.radians multiplies by
+_TWO_R = 2 * EARTH_RADIUS_KM
+_DEG2RAD = math.pi / 180.0
+
+# "lat,lng" with optional whitespace around both numbers
+_COORD_RE = re.compile(r'^\s*([-+]?(?:\d+(?:\.\d*)?|\.\d+))\s*,\s*([-+]?(?:\d+(?:\.\d*)?|\.\d+))\s*$')
+
+# Fields that a route request must contain
+_REQUIRED_FIELDS = ('startPoint', 'endPoint')
+
+# Optional numeric fields of a route request:
+# (field, minimum, maximum, range error message, type error message)
+_NUMERIC_FIELDS = (
+    ('pipeDiameter', 100, 2000,
+     'Диаметр трубопровода должен быть от 100 до 2000 мм',
+     'Диаметр трубопровода должен быть числом'),
+    ('maxPressure', 1, 100,
+     'Максимальное давление должно быть от 1 до 100 атм',
+     'Максимальное давление должно быть числом'),
+)
+
+# Module-level bindings of the math functions used by the distance functions,
+# which skip the attribute lookup on every interpreted call
+_sin = math.sin
+_cos = math.cos
+_sqrt = math.sqrt
+_asin = math.asin
+_hypot = math.hypot
+
+# Fastmath flags of the kernels that sum path lengths. Reassociation is left
+# out, since it would let the compiler optimize the compensated sum away
+_SUM_FASTMATH = {'nnan', 'ninf', 'nsz', 'arcp', 'contract', 'afn'}
+
+# Below this haversine term (segments up to about 127 km) asin(sqrt(a)) is
+# evaluated with a truncated series whose error is under double rounding
+_ASIN_SERIES_MAX_A = 1e-4
+
+@njit(cache=True, fastmath=True)
+def _asin_sqrt(a: float) -> float:
+    """
+    Compute asin(sqrt(a)) for a in [0, 1].
+
+    Route segments are short, so almost every call takes the polynomial
+    branch, which is about twice as fast as the libm asin once compiled.
+    Interpreted, the polynomial is slower than math.asin and is skipped.
+    """
+    x = _sqrt(a)
+    if HAVE_NUMBA and a < _ASIN_SERIES_MAX_A:
+        return x * (1.0 + a * (1.0 / 6 + a * (3.0 / 40 + a * (15.0 / 336))))
+    return _asin(x)
+
+@njit(cache=True, fastmath=True)
+def _haversine_radians(lat1: float, lon1: float, cos_lat1: float,
+                       lat2: float, lon2: float, cos_lat2: float) -> float:
+    """
+    Great-circle distance in kilometers between two points given in radians.
+
+    Takes the cosines of the latitudes, so that paths compute each one once.
+    """
+    a = _sin((lat2 - lat1) / 2)**2 + cos_lat1 * cos_lat2 * _sin((lon2 - lon1) / 2)**2
+    
+    # 2 * asin(sqrt(a)) equals 2 * atan2(sqrt(a), sqrt(1 - a)) with one square root less, as in
+    # scikit-learn's haversine metric; rounding can push a of antipodal points above 1
+    return _TWO_R * _asin_sqrt(min(a, 1.0))
+
+@njit(cache=True, fastmath=True)
+def _haversine_scalar(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometers between two points given in degrees."""
+    lat1 *= _DEG2RAD
+    lat2 *= _DEG2RAD
+    return _haversine_radians(lat1, lon1 * _DEG2RAD, _cos(lat1), lat2, lon2 * _DEG2RAD, _cos(lat2))
+
+@njit(cache=True, fastmath=True)
+def _equirectangular_scalar(lat1: float, lon1: float, lat2: float, lon2: float, cos_lat0: float) -> float:
+    """
+    Approximate distance in kilometers between two points given in degrees.
+
+    Uses the equirectangular projection around a fixed latitude, whose cosine
+    is cos_lat0. Accurate for the short distances within a route segment.
+    """
+    return EARTH_RADIUS_KM * _hypot((lat2 - lat1) * _DEG2RAD, cos_lat0 * ((lon2 - lon1) * _DEG2RAD))
+
+@njit(cache=True, fastmath=_SUM_FASTMATH)
+def _compensated_add(total: float, compensation: float, value: float):
+    """
+    Add value to a Kahan compensated sum.
+
+    Returns:
+        Tuple of the new total and the rounding error it carries
+    """
+    value -= compensation
+    new_total = total + value
+    return new_total, (new_total - total) - value
+
+@njit(cache=True, fastmath=_SUM_FASTMATH)
+def haversine_cumulative(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Calculate cumulative great-circle distances along a path in one pass.
+    
+    Args:
+        lats: Array of latitudes in degrees
+        lons: Array of longitudes in degrees
+        
+    Returns:
+        Array of cumulative distances in kilometers (the first one is 0.0)
+    """
+    n = lats.shape[0]
+    out = np.zeros(n)
+    if n == 0:
+        return out
+    
+    # Each point is converted once and reused as the start of the next segment
+    prev_lat = lats[0] * _DEG2RAD
+    prev_lon = lons[0] * _DEG2RAD
+    prev_cos = _cos(prev_lat)
+    total = 0.0
+    compensation = 0.0
+    for i in range(1, n):
+        # Repeated points add nothing, so the trigonometry is skipped for them
+        if lats[i] == lats[i - 1] and lons[i] == lons[i - 1]:
+            out[i] = out[i - 1]
+            continue
+        lat = lats[i] * _DEG2RAD
+        lon = lons[i] * _DEG2RAD
+        cos_lat = _cos(lat)
+        total, compensation = _compensated_add(
+            total, compensation, _haversine_radians(prev_lat, prev_lon, prev_cos, lat, lon, cos_lat))
+        out[i] = total
+        prev_lat, prev_lon, prev_cos = lat, lon, cos_lat
+    return out
+
+@njit(cache=True, fastmath=_SUM_FASTMATH, nogil=True)
+def _path_length_kernel(lats: np.ndarray, lons: np.ndarray) -> float:
+    """Total great-circle length in kilometers of a path given as arrays of degrees."""
+    total = 0.0
+    if lats.shape[0] == 0:
+        return total
+    
+    # Each point is converted once and reused as the start of the next segment
+    prev_lat = lats[0] * _DEG2RAD
+    prev_lon = lons[0] * _DEG2RAD
+    prev_cos = _cos(prev_lat)
+    compensation = 0.0
+    for i in range(1, lats.shape[0]):
+        # Repeated points add nothing, so the trigonometry is skipped for them
+        if lats[i] == lats[i - 1] and lons[i] == lons[i - 1]:
+            continue
+        lat = lats[i] * _DEG2RAD
+        lon = lons[i] * _DEG2RAD
+        cos_lat = _cos(lat)
+        total, compensation = _compensated_add(
+            total, compensation, _haversine_radians(prev_lat, prev_lon, prev_cos, lat, lon, cos_lat))
+        prev_lat, prev_lon, prev_cos = lat, lon, cos_lat
+    return total
+
+def haversine_distance(point1: Tuple[float, float], point2: Tuple[float, float], fast: bool = False) -> float:
     """
     Calculate the great-circle distance between two points on Earth.
     
     Args:
         point1: First point as (latitude, longitude)
         point2: Second point as (latitude, longitude)
+        fast: Use the equirectangular approximation around the mean latitude
+            of the points, which is off by about 1 cm at 15 km and 1 m at 75 km
         
     Returns:
         Distance in kilometers
     """
-    # Earth radius in kilometers
-    R = 6371.0
+    lat1, lon1, lat2, lon2 = float(point1[0]), float(point1[1]), float(point2[0]), float(point2[1])
+    if fast:
+        return _equirectangular_scalar(lat1, lon1, lat2, lon2, _cos((lat1 + lat2) * (0.5 * _DEG2RAD)))
+    return _haversine_scalar(lat1, lon1, lat2, lon2)
+
+def equirectangular_to_point(lats: np.ndarray, lngs: np.ndarray, point: Tuple[Any, Any],
+                            cos_lat0: float) -> np.ndarray:
+    """
+    Approximate the distances from many points to one point.
     
-    # Convert coordinates to radians
-    lat1, lon1 = math.radians(point1[0]), math.radians(point1[1])
-    lat2, lon2 = math.radians(point2[0]), math.radians(point2[1])
+    Args:
+        lats: Array of latitudes in degrees
+        lngs: Array of longitudes in degrees
+        point: Target point as (latitude, longitude), or arrays of target
+            points that broadcast against lats and lngs
+        cos_lat0: Cosine of the latitude of the projection, see _equirectangular_scalar
+        
+    Returns:
+        Array of distances in kilometers
+    """
+    return EARTH_RADIUS_KM * np.hypot(np.radians(lats - point[0]), cos_lat0 * np.radians(lngs - point[1]))
+
+def points_to_soa(points: List[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split points into contiguous arrays of latitudes and longitudes.
     
-    # Differences
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
+    Args:
+        points: List of points as (latitude, longitude) or an (N, 2) array
+        
+    Returns:
+        Tuple of (latitudes, longitudes) arrays in degrees
+    """
+    if isinstance(points, np.ndarray):
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return np.ascontiguousarray(pts[:, 0]), np.ascontiguousarray(pts[:, 1])
     
-    # Haversine formula
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    distance = R * c
+    # One pass per coordinate over the tuples is faster than building an
+    # (N, 2) array and copying its columns
+    count = len(points)
+    lats = np.fromiter((point[0] for point in points), dtype=np.float64, count=count)
+    lons = np.fromiter((point[1] for point in points), dtype=np.float64, count=count)
+    return lats, lons
+
+def _haversine_segments(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances in kilometers between consecutive points given as arrays of degrees."""
+    lat = np.radians(lats)
+    cos_lat = np.cos(lat)
     
-    return distance
+    # Haversine formula applied to all consecutive segments at once, computed
+    # in place to avoid a temporary array per operation
+    half_lat = np.diff(lat)
+    half_lat *= 0.5
+    np.sin(half_lat, out=half_lat)
+    np.square(half_lat, out=half_lat)
+    a = np.diff(np.radians(lons))
+    a *= 0.5
+    np.sin(a, out=a)
+    np.square(a, out=a)
+    a *= cos_lat[:-1]
+    a *= cos_lat[1:]
+    a += half_lat
+    np.minimum(a, 1.0, out=a)
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    a *= _TWO_R
+    return a
 
-def calculate_distance(points: List[Tuple[float, float]]) -> float:
+def calculate_distance(points: List[Tuple[float, float]], fast: bool = False) -> float:
     """
     Calculate total distance of a path.
     
     Args:
-        points: List of points as (latitude, longitude)
+        points: List of points as (latitude, longitude) or an (N, 2) array
+        fast: Approximate each segment like haversine_distance(..., fast=True)
         
     Returns:
         Total distance in kilometers
     """
-    total_distance = 0.0
-    for i in range(len(points) - 1):
-        total_distance += haversine_distance(points[i], points[i+1])
-    return total_distance
+    lats, lons = points_to_soa(points)
+    return calculate_distance_arrays(lats, lons, fast)
+
+def calculate_distance_arrays(lats: np.ndarray, lons: np.ndarray, fast: bool = False) -> float:
+    """
+    Calculate total distance of a path given as arrays of coordinates.
+    
+    Contiguous float64 arrays are used as they are, so callers that keep
+    their points in this layout skip the conversion of calculate_distance.
+    
+    Args:
+        lats: Array of latitudes in degrees
+        lons: Array of longitudes in degrees
+        fast: Approximate each segment like haversine_distance(..., fast=True)
+        
+    Returns:
+        Total distance in kilometers
+    """
+    lats = np.ascontiguousarray(lats, dtype=np.float64)
+    lons = np.ascontiguousarray(lons, dtype=np.float64)
+    if len(lats) < 2:
+        return 0.0
+    
+    if fast:
+        # Equirectangular projection around the mean latitude of each segment
+        cos_mean_lat = np.cos(np.radians((lats[:-1] + lats[1:]) * 0.5))
+        return float(EARTH_RADIUS_KM * np.hypot(np.radians(np.diff(lats)),
+                                                cos_mean_lat * np.radians(np.diff(lons))).sum())
+    
+    if HAVE_NUMBA:
+        return _path_length_kernel(lats, lons)
+    
+    return float(_haversine_segments(lats, lons).sum())
+
+@njit(cache=True, nogil=True)
+def _batch_length_kernel(routes: np.ndarray) -> np.ndarray:
+    """Lengths in kilometers of the NaN-padded paths in a (B, N, 2) array of degrees."""
+    out = np.zeros(routes.shape[0])
+    for b in range(routes.shape[0]):
+        # Without fastmath, so that the NaN checks are kept
+        count = 0
+        while (count < routes.shape[1] and not math.isnan(routes[b, count, 0])
+               and not math.isnan(routes[b, count, 1])):
+            count += 1
+        out[b] = _path_length_kernel(routes[b, :count, 0], routes[b, :count, 1])
+    return out
+
+def calculate_distance_batch(routes: np.ndarray) -> np.ndarray:
+    """
+    Calculate the total distances of many paths at once.
+    
+    Args:
+        routes: Array of shape (B, N, 2) with B paths of (latitude, longitude)
+            points. Shorter paths are padded at the end with NaN points
+        
+    Returns:
+        Array of B distances in kilometers
+    """
+    routes = np.asarray(routes, dtype=np.float64)
+    num_routes, num_points = routes.shape[:2]
+    if num_routes == 0 or num_points < 2:
+        return np.zeros(num_routes)
+    
+    if HAVE_NUMBA:
+        return _batch_length_kernel(routes)
+    
+    # Each path ends before its first padding point
+    padding = np.isnan(routes[:, :, 0]) | np.isnan(routes[:, :, 1])
+    counts = np.where(padding.any(axis=1), padding.argmax(axis=1), num_points)
+    
+    # Segments of all paths in one pass over the flattened points, dropping
+    # those that join two paths or reach into the padding
+    segments = np.zeros((num_routes, num_points))
+    segments.reshape(-1)[:-1] = _haversine_segments(routes[:, :, 0].ravel(), routes[:, :, 1].ravel())
+    segments[np.arange(num_points) >= counts[:, None] - 1] = 0.0
+    return segments.sum(axis=1)
+
+def cumulative_distance(points: List[Tuple[float, float]]) -> np.ndarray:
+    """
+    Calculate the distance from the first point to every point along a path.
+    
+    Args:
+        points: List of points as (latitude, longitude) or an (N, 2) array
+        
+    Returns:
+        Array of N cumulative distances in kilometers (the first one is 0.0)
+    """
+    lats, lons = points_to_soa(points)
+    if len(lats) == 0:
+        return np.zeros(0)
+    
+    if HAVE_NUMBA:
+        return haversine_cumulative(lats, lons)
+    
+    return np.concatenate(([0.0], np.cumsum(_haversine_segments(lats, lons))))
 
 def parse_coordinates(coord_str: str) -> Tuple[float, float]:
     """
@@ -67,22 +374,20 @@ def parse_coordinates(coord_str: str) -> Tuple[float, float]:
     if not coord_str:
         raise ValueError("Координаты не указаны")
         
-    # Remove any whitespace and split by comma
-    parts = coord_str.strip().replace(" ", "").split(",")
-    
-    if len(parts) != 2:
-        raise ValueError("Неверный формат координат. Используйте: широта,долгота")
-    
-    try:
-        lat = float(parts[0])
-        lng = float(parts[1])
-    except ValueError:
+    # Match both numbers in one pass; the split only tells apart the error messages
+    match = _COORD_RE.match(coord_str)
+    if match is None:
+        if len(coord_str.split(",")) != 2:
+            raise ValueError("Неверный формат координат. Используйте: широта,долгота")
         raise ValueError("Координаты должны быть числами")
     
-    # Validate coordinate ranges
-    if lat < -90 or lat > 90:
+    lat = float(match.group(1))
+    lng = float(match.group(2))
+    
+    # Validate coordinate ranges, one comparison per coordinate
+    if abs(lat) > 90.0:
         raise ValueError("Широта должна быть в диапазоне от -90 до 90")
-    if lng < -180 or lng > 180:
+    if abs(lng) > 180.0:
         raise ValueError("Долгота должна быть в диапазоне от -180 до 180")
     
     return (lat, lng)
@@ -95,12 +400,12 @@ def validate_input(data: Dict[str, Any]) -> Dict[str, Any]:
         data: Input data dictionary
         
     Returns:
-        Dictionary with validation result
+        Dictionary with validation result, and the parsed start_point and
+        end_point if the input is valid
     """
     # Check required fields
-    required_fields = ['startPoint', 'endPoint']
-    for field in required_fields:
-        if field not in data or not data[field]:
+    for field in _REQUIRED_FIELDS:
+        if not data.get(field):
             return {
                 'valid': False,
                 'message': f'Поле {field} обязательно для заполнения'
@@ -130,45 +435,42 @@ def validate_input(data: Dict[str, Any]) -> Dict[str, Any]:
             'message': 'Начальная и конечная точки не могут совпадать'
         }
     
-    # Validate pipe diameter
-    if 'pipeDiameter' in data:
-        try:
-            pipe_diameter = float(data['pipeDiameter'])
-            if pipe_diameter < 100 or pipe_diameter > 2000:
+    # Validate optional numeric parameters
+    for field, low, high, range_message, type_message in _NUMERIC_FIELDS:
+        if field in data:
+            try:
+                value = float(data[field])
+            except (TypeError, ValueError):
                 return {
                     'valid': False,
-                    'message': 'Диаметр трубопровода должен быть от 100 до 2000 мм'
+                    'message': type_message
                 }
-        except ValueError:
-            return {
-                'valid': False,
-                'message': 'Диаметр трубопровода должен быть числом'
-            }
-    
-    # Validate max pressure
-    if 'maxPressure' in data:
-        try:
-            max_pressure = float(data['maxPressure'])
-            if max_pressure < 1 or max_pressure > 100:
+            if not low <= value <= high:
                 return {
                     'valid': False,
-                    'message': 'Максимальное давление должно быть от 1 до 100 атм'
+                    'message': range_message
                 }
-        except ValueError:
-            return {
-                'valid': False,
-                'message': 'Максимальное давление должно быть числом'
-            }
     
     # All validations passed
     return {
         'valid': True,
-        'message': 'OK'
+        'message': 'OK',
+        'start_point': start_point,
+        'end_point': end_point
     }
 
+# Labels for the values below one kilometer or one million rubles, which are
+# shown as whole meters or thousands
+_METER_LABELS = tuple(f"{meters} м" for meters in range(1000))
+_THOUSAND_LABELS = tuple(f"{thousands} тыс. ₽" for thousands in range(1000))
+
+@lru_cache(maxsize=512)
 def format_distance(distance: float) -> str:
     """
     Format distance in readable format.
+
+    Results are cached, since route descriptions format the same
+    cumulative distances for several sentences.
     
     Args:
         distance: Distance in kilometers
@@ -179,7 +481,7 @@ def format_distance(distance: float) -> str:
     if distance < 1:
         # Convert to meters if less than 1 km
         meters = int(distance * 1000)
-        return f"{meters} м"
+        return _METER_LABELS[meters] if meters >= 0 else f"{meters} м"
     else:
         # Round to 2 decimal places
         return f"{distance:.2f} км"
@@ -197,7 +499,14 @@ def format_cost(cost: float) -> str:
     if cost < 1:
         # Convert to thousands if less than 1 million
         thousands = int(cost * 1000)
-        return f"{thousands} тыс. ₽"
+        return _THOUSAND_LABELS[thousands] if thousands >= 0 else f"{thousands} тыс. ₽"
     else:
         # Round to 2 decimal places
         return f"{cost:.2f} млн. ₽"
+
+# Compile the JIT kernels at import time so the first request isn't penalized
+if HAVE_NUMBA:
+    _haversine_scalar(0.0, 0.0, 0.0, 0.0)
+    haversine_cumulative(np.zeros(2), np.zeros(2))
+    _path_length_kernel(np.zeros(2), np.zeros(2))
+    _batch_length_kernel(np.zeros((1, 2, 2)))
@@ -372,10 +372,11 @@ const Map = {
     },
 
     renderTerrainHeatmap: function(grid) {
-        for (let row of grid) {
-            for (let cell of row) {
-                const position = cell.position;
-                const difficulty = cell.difficulty;
+        for (let i = 0; i < grid.lats.length; i++) {
+            const row = grid.difficulty[i];
+            for (let j = 0; j < grid.lngs.length; j++) {
+                const position = [grid.lats[i], grid.lngs[j]];
+                const difficulty = row[j];
 
                 if (difficulty < 0.1) continue;
 
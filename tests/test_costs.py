@@ -0,0 +1,42 @@
+"""Tests of the pipe type and material codes of the cost model."""
+
+import unittest
+
+import numpy as np
+
+from route_planner.costs import (Material, PipeType, calculate_all_costs, encode_material,
+                                 encode_pipe_type)
+
+class EncodeTest(unittest.TestCase):
+    def test_names_and_enums(self):
+        self.assertEqual(encode_pipe_type('gas'), PipeType.GAS)
+        self.assertEqual(encode_pipe_type(PipeType.WATER), PipeType.WATER)
+        self.assertEqual(encode_pipe_type(np.int64(0)), PipeType.OIL)
+        self.assertEqual(encode_material('composite'), Material.COMPOSITE)
+        self.assertEqual(encode_material(Material.PLASTIC), Material.PLASTIC)
+
+    def test_invalid_codes_map_to_other(self):
+        for value in (len(PipeType), 5, 9, -1, True, False, np.int64(-2), 'steam', None, 1.0, [1]):
+            with self.subTest(value=value):
+                self.assertEqual(encode_pipe_type(value), PipeType.OTHER)
+                self.assertEqual(encode_material(value), Material.OTHER)
+
+    def test_invalid_codes_use_default_factors(self):
+        default = calculate_all_costs(10.0, 500.0, 'unknown', 0.3, 'unknown')
+        for value in (5, 9, -1, True):
+            with self.subTest(value=value):
+                self.assertEqual(calculate_all_costs(10.0, 500.0, value, 0.3, value), default)
+
+class CalculateRouteTest(unittest.TestCase):
+    def test_out_of_range_codes(self):
+        from app import app
+        client = app.test_client()
+        for field, value in (('pipeType', 5), ('pipeMaterial', 9), ('pipeType', -1)):
+            with self.subTest(field=field, value=value):
+                response = client.post('/api/calculate_route', json={
+                    'startPoint': '52.6,104.1', 'endPoint': '52.602,104.101', field: value})
+                self.assertEqual(response.status_code, 200, response.get_json())
+                self.assertTrue(response.get_json()['success'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,238 @@
+"""Tests of the grid search kernels and their heap, compiled and as plain Python."""
+
+import heapq
+import importlib
+import math
+import sys
+import unittest
+
+import numpy as np
+
+import route_planner._heap4
+import route_planner.a_star
+
+STEP = 0.001
+WEIGHTS = np.array([0.3, 0.2, 0.15, 0.2, 0.15])
+
+def _import_without_numba():
+    """
+    Import fresh copies of a_star and _heap4 with Numba hidden.
+
+    The copies run their kernels as plain Python; the modules imported by
+    the rest of the process are left untouched.
+    """
+    def is_ours(name):
+        return name == 'numba' or name == 'route_planner' or name.startswith('route_planner.')
+
+    saved = {name: module for name, module in sys.modules.items() if is_ours(name)}
+    for name in saved:
+        del sys.modules[name]
+    sys.modules['numba'] = None
+    try:
+        return importlib.import_module('route_planner.a_star'), importlib.import_module('route_planner._heap4')
+    finally:
+        for name in [name for name in sys.modules if is_ours(name)]:
+            del sys.modules[name]
+        sys.modules.update(saved)
+
+def _make_grid(height, width, seed, uniform=False):
+    """Random terrain arrays of a search grid, as sampled by MultiCriteriaAStar._get_search_grid."""
+    rng = np.random.default_rng(seed)
+    arrays = {
+        'difficulty': rng.uniform(0.0, 1.0, (height, width)),
+        'accessibility': rng.uniform(0.0, 1.0, (height, width)),
+        'environmental_impact': rng.uniform(0.0, 0.05, (height, width)),
+        'construction_cost_per_km': rng.uniform(5.0, 20.0, (height, width)),
+    }
+    if uniform:
+        arrays = {name: np.full_like(values, values[0, 0]) for name, values in arrays.items()}
+    arrays['valid'] = np.ones((height, width), dtype=np.bool_)
+    arrays['lats'] = 52.0 + STEP * np.arange(height)
+    arrays['lngs'] = 104.0 + STEP * np.arange(width)
+    return arrays
+
+def _goal_values(grid, goal):
+    """Terrain values at a goal placed on a grid cell."""
+    return np.array([grid['difficulty'][goal], grid['accessibility'][goal],
+                     grid['environmental_impact'][goal], grid['construction_cost_per_km'][goal]])
+
+class _SearchTests:
+    """Tests run against the a_star and _heap4 modules of a subclass."""
+
+    a_star = None
+    heap4 = None
+
+    def _search(self, core, grid, start, goal):
+        """Run a search core from a start cell to a goal cell; returns (path, g-scores at the goal)."""
+        path, g_score, _ = core(grid['lats'], grid['lngs'], grid['difficulty'], grid['accessibility'],
+                                grid['valid'], grid['environmental_impact'], grid['construction_cost_per_km'],
+                                start[0], start[1], grid['lats'][goal[0]], grid['lngs'][goal[1]],
+                                _goal_values(grid, goal), WEIGHTS, STEP, 100000)
+        return path, g_score
+
+    def _edge(self, grid, goal, cos_lat0, g_prev, a, b):
+        """G-scores after the edge from node a to node b, of which the goal is height * width."""
+        height, width = grid['difficulty'].shape
+        out = np.empty(5)
+        if b == height * width:
+            lat, lng = grid['lats'][goal[0]], grid['lngs'][goal[1]]
+            values = _goal_values(grid, goal)
+        else:
+            lat, lng = grid['lats'][b // width], grid['lngs'][b % width]
+            values = [grid[name][b // width, b % width]
+                      for name in ('difficulty', 'accessibility', 'environmental_impact', 'construction_cost_per_km')]
+        d = self.a_star._equirectangular_scalar(grid['lats'][a // width], grid['lngs'][a % width], lat, lng, cos_lat0)
+        return self.a_star._add_edge_costs(g_prev, d, *values, WEIGHTS, out), out
+
+    def _optimal_cost(self, grid, start, goal):
+        """Cost of the cheapest path on the graph of the search cores, by Dijkstra's algorithm."""
+        height, width = grid['difficulty'].shape
+        goal_node = height * width
+        goal_lat, goal_lng = grid['lats'][goal[0]], grid['lngs'][goal[1]]
+        cos_lat0 = math.cos(math.radians((grid['lats'][start[0]] + goal_lat) / 2))
+
+        def dist_to_goal(i, j):
+            return self.a_star._equirectangular_scalar(grid['lats'][i], grid['lngs'][j], goal_lat, goal_lng, cos_lat0)
+
+        start_node = start[0] * width + start[1]
+        best = {start_node: 0.0}
+        scores = {start_node: np.zeros(5)}
+        open_set = [(0.0, start_node)]
+        while open_set:
+            cost, node = heapq.heappop(open_set)
+            if node == goal_node:
+                return cost
+            if cost > best[node]:
+                continue
+            i, j = divmod(node, width)
+            successors = [ni * width + nj
+                          for ni in range(max(i - 1, 0), min(i + 2, height))
+                          for nj in range(max(j - 1, 0), min(j + 2, width))
+                          if (ni, nj) != (i, j) and (grid['valid'][ni, nj] or dist_to_goal(ni, nj) < STEP * 3)]
+            if dist_to_goal(i, j) < STEP * 4:
+                successors.append(goal_node)
+            for successor in successors:
+                combined, g_score = self._edge(grid, goal, cos_lat0, scores[node], node, successor)
+                if combined < best.get(successor, np.inf):
+                    best[successor] = combined
+                    scores[successor] = g_score
+                    heapq.heappush(open_set, (combined, successor))
+        return np.inf
+
+    def _path_cost(self, grid, start, goal, path):
+        """G-scores of a path of grid nodes followed by the goal."""
+        height, width = grid['difficulty'].shape
+        cos_lat0 = math.cos(math.radians((grid['lats'][start[0]] + grid['lats'][goal[0]]) / 2))
+        nodes = list(path) + [height * width]
+        g_score = np.zeros(5)
+        for a, b in zip(nodes, nodes[1:]):
+            g_score = self._edge(grid, goal, cos_lat0, g_score, a, b)[1]
+        return g_score
+
+    def _check_path(self, grid, start, goal, path, g_score):
+        """Check that a path starts at the start cell and has the returned g-scores."""
+        self.assertEqual(path[0], start[0] * grid['lngs'].size + start[1])
+        np.testing.assert_allclose(self._path_cost(grid, start, goal, path), g_score, rtol=1e-9, atol=1e-12)
+
+    def test_bidirectional_finds_the_optimal_path(self):
+        for seed in range(4):
+            with self.subTest(seed=seed):
+                grid = _make_grid(24, 24, seed)
+                start, goal = (2, 3), (20, 21)
+                path, g_score = self._search(self.a_star._bidirectional_core, grid, start, goal)
+                self._check_path(grid, start, goal, path, g_score)
+                self.assertAlmostEqual(g_score @ WEIGHTS, self._optimal_cost(grid, start, goal), places=9)
+
+    def test_astar_is_never_cheaper_than_bidirectional(self):
+        for seed in range(4):
+            with self.subTest(seed=seed):
+                grid = _make_grid(24, 24, seed)
+                start, goal = (2, 3), (20, 21)
+                astar_path, astar_g = self._search(self.a_star._astar_core, grid, start, goal)
+                self._check_path(grid, start, goal, astar_path, astar_g)
+                _, bidirectional_g = self._search(self.a_star._bidirectional_core, grid, start, goal)
+                self.assertGreaterEqual(astar_g @ WEIGHTS, bidirectional_g @ WEIGHTS - 1e-9)
+
+    def test_uniform_terrain_costs_agree(self):
+        for start, goal in (((2, 3), (20, 21)), ((12, 1), (12, 22)), ((20, 4), (3, 9))):
+            with self.subTest(start=start, goal=goal):
+                grid = _make_grid(24, 24, 0, uniform=True)
+                _, astar_g = self._search(self.a_star._astar_core, grid, start, goal)
+                _, bidirectional_g = self._search(self.a_star._bidirectional_core, grid, start, goal)
+                self.assertAlmostEqual(astar_g @ WEIGHTS, bidirectional_g @ WEIGHTS, places=9)
+
+    def test_wall_with_a_gap(self):
+        grid = _make_grid(24, 24, 5)
+        grid['valid'][12, :] = False
+        grid['valid'][12, 2] = True
+        start, goal = (2, 20), (21, 20)
+        path, g_score = self._search(self.a_star._bidirectional_core, grid, start, goal)
+        self._check_path(grid, start, goal, path, g_score)
+        self.assertIn(12 * 24 + 2, path.tolist())
+        self.assertAlmostEqual(g_score @ WEIGHTS, self._optimal_cost(grid, start, goal), places=9)
+        _, astar_g = self._search(self.a_star._astar_core, grid, start, goal)
+        self.assertGreaterEqual(astar_g @ WEIGHTS, g_score @ WEIGHTS - 1e-9)
+
+    def test_unreachable_goal(self):
+        grid = _make_grid(24, 24, 1)
+        # Invalid ring around the start, far from the goal
+        grid['valid'][2:9, 2:9] = False
+        grid['valid'][3:8, 3:8] = True
+        start, goal = (5, 5), (20, 20)
+        self.assertEqual(self._optimal_cost(grid, start, goal), np.inf)
+        for core in (self.a_star._astar_core, self.a_star._bidirectional_core):
+            with self.subTest(core=core.__name__):
+                path, g_score = self._search(core, grid, start, goal)
+                self.assertEqual(len(path), 0)
+                np.testing.assert_array_equal(g_score, np.zeros(5))
+
+    def test_start_is_goal(self):
+        grid = _make_grid(24, 24, 2)
+        start = goal = (10, 10)
+        results = [self._search(core, grid, start, goal)
+                   for core in (self.a_star._astar_core, self.a_star._bidirectional_core)]
+        for path, g_score in results:
+            self.assertEqual(path.tolist(), [10 * 24 + 10])
+            self._check_path(grid, start, goal, path, g_score)
+        np.testing.assert_allclose(results[0][1], results[1][1])
+
+    def test_heap_order_matches_heapq(self):
+        rng = np.random.default_rng(3)
+        capacity = 2000
+        keys = np.empty(capacity)
+        seqs = np.empty(capacity, dtype=np.int64)
+        items = np.empty(capacity, dtype=np.int64)
+        size = 0
+        reference = []
+        for seq in range(capacity):
+            # Few distinct keys, so that the sequence numbers break ties
+            key = float(rng.integers(0, 20))
+            size = self.heap4.push(keys, seqs, items, size, key, seq, seq * 7)
+            heapq.heappush(reference, (key, seq, seq * 7))
+            if rng.random() < 0.4:
+                key, seq_popped, item, size = self.heap4.pop(keys, seqs, items, size)
+                self.assertEqual((key, seq_popped, item), heapq.heappop(reference))
+        while size:
+            key, seq_popped, item, size = self.heap4.pop(keys, seqs, items, size)
+            self.assertEqual((key, seq_popped, item), heapq.heappop(reference))
+        self.assertEqual(reference, [])
+
+class SearchTest(_SearchTests, unittest.TestCase):
+    """Kernels as imported, compiled when Numba is installed."""
+
+    a_star = route_planner.a_star
+    heap4 = route_planner._heap4
+
+class InterpretedSearchTest(_SearchTests, unittest.TestCase):
+    """Kernels run as plain Python."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.a_star, cls.heap4 = _import_without_numba()
+
+    def test_numba_is_off(self):
+        self.assertFalse(self.a_star.HAVE_NUMBA)
+        self.assertFalse(hasattr(self.a_star._bidirectional_core, 'py_func'))
+
+if __name__ == '__main__':
+    unittest.main()